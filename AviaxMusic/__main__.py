@@ -7,20 +7,24 @@ from pytgcalls.exceptions import NoActiveGroupCall
 import config
 from AviaxMusic import LOGGER, app, userbot
 from AviaxMusic.core.call import Aviax
+from AviaxMusic.core.executor import executor
+from AviaxMusic.core.http import http
+from AviaxMusic.core.mongo import ensure_indexes
 from AviaxMusic.misc import sudo
 from AviaxMusic.plugins import ALL_MODULES
-from AviaxMusic.utils.database import get_banned_users, get_gbanned
+from AviaxMusic.utils.database import (
+    get_banned_users,
+    get_gbanned,
+    migrate_settings,
+    warm_settings,
+)
+from AviaxMusic.utils.mediacache import media_cache, playback_cache
+from AviaxMusic.utils.writebehind import writer
 from config import BANNED_USERS
 
 
 async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
+    if not config.STRING_SESSIONS:
         LOGGER(__name__).error("Assistant client variables not defined, exiting...")
         exit()
     await sudo()
@@ -33,6 +37,23 @@ async def init():
             BANNED_USERS.add(user_id)
     except:
         pass
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        LOGGER(__name__).warning(f"Failed to create mongo indexes: {e}")
+    try:
+        await migrate_settings()
+    except Exception as e:
+        LOGGER(__name__).error(
+            f"Failed to migrate chat settings, reading the old ones until it runs: {e}"
+        )
+    try:
+        await warm_settings()
+    except Exception as e:
+        LOGGER(__name__).warning(f"Failed to preload chat settings: {e}")
+    media_cache.scan()
+    playback_cache.scan()
+    await http.start()
     await app.start()
     for all_module in ALL_MODULES:
         importlib.import_module("AviaxMusic.plugins" + all_module)
@@ -53,8 +74,11 @@ async def init():
         "\x41\x76\x69\x61\x78\x20\x4d\x75\x73\x69\x63\x20\x53\x74\x61\x72\x74\x65\x64\x20\x53\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x6c\x79\x2e\x0a\x0a\x44\x6f\x6e\x27\x74\x20\x66\x6f\x72\x67\x65\x74\x20\x74\x6f\x20\x76\x69\x73\x69\x74\x20\x40\x41\x76\x69\x61\x78\x4f\x66\x66\x69\x63\x69\x61\x6c"
     )
     await idle()
+    await writer.stop()
     await app.stop()
     await userbot.stop()
+    await http.stop()
+    executor.shutdown()
     LOGGER("AviaxMusic").info("Stopping Aviax Music Bot...")
 
 
@@ -4,6 +4,13 @@ from datetime import datetime, timedelta
 from typing import Union
 
 from pyrogram import Client
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.errors import (
+    FloodWait,
+    InviteRequestSent,
+    UserAlreadyParticipant,
+    UserNotParticipant,
+)
 from pyrogram.types import InlineKeyboardMarkup
 from pytgcalls import PyTgCalls, StreamType
 from pytgcalls.exceptions import (
@@ -12,8 +19,13 @@ from pytgcalls.exceptions import (
     TelegramServerError,
 )
 from pytgcalls.types import Update
-from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
-from pytgcalls.types.input_stream.quality import HighQualityAudio, MediumQualityVideo
+from pytgcalls.types.input_stream import (
+    AudioPiped,
+    AudioVideoPiped,
+    InputAudioStream,
+    InputStream,
+)
+from pytgcalls.types.input_stream.quality import HighQualityAudio
 from pytgcalls.types.stream import StreamAudioEnded
 
 import config
@@ -22,92 +34,150 @@ from AviaxMusic.misc import db
 from AviaxMusic.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    get_assistant_number,
+    get_client,
     get_lang,
     get_loop,
     group_assistant,
+    is_active_chat,
     is_autoend,
+    is_music_playing,
     music_on,
     remove_active_chat,
     remove_active_video_chat,
+    set_assistant_new,
     set_loop,
 )
+from AviaxMusic.utils.downloader import downloader
 from AviaxMusic.utils.exceptions import AssistantErr
-from AviaxMusic.utils.formatters import check_duration, seconds_to_min, speed_converter
+from AviaxMusic.utils.formatters import seconds_to_min, time_to_seconds
 from AviaxMusic.utils.inline.play import stream_markup
+from AviaxMusic.utils.mediacache import playback_cache
+from AviaxMusic.utils.quality import quality_policy
+from AviaxMusic.utils.scheduler import scheduler
+from AviaxMusic.utils.sessions import sessions
 from AviaxMusic.utils.stream.autoclear import auto_clean
+from AviaxMusic.utils.stream.notify import notifier
+from AviaxMusic.utils.stream.position import (
+    get_position,
+    pause_position,
+    reset_position,
+    resume_position,
+    set_position,
+)
+from AviaxMusic.utils.stream.prefetch import prefetcher
+from AviaxMusic.utils.stream.radio import radio
+from AviaxMusic.utils.streamurl import stream_urls
+from AviaxMusic.utils.transcode import transcoder
 from AviaxMusic.utils.thumbnails import gen_thumb
 from strings import get_string
 
-autoend = {}
-counter = {}
+# A url stream ending this many seconds before its duration was cut off.
+EARLY_END = 30
+
+def speed_params(speed, position) -> str:
+    # Seek in the original file, speed the video up by rescaling its timestamps
+    # and the audio with atempo on the output, so no re-encode is needed first.
+    return (
+        f"-ss {int(position)} -itsscale:v {round(1 / float(speed), 4)} "
+        f"-atend -filter:a atempo={speed}"
+    )
 
 
 async def _clear_(chat_id):
     db[chat_id] = []
+    prefetcher.cancel(chat_id)
+    notifier.cancel(chat_id)
+    radio.leave(chat_id)
+    quality_policy.forget(chat_id)
     await remove_active_video_chat(chat_id)
     await remove_active_chat(chat_id)
 
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="AviaxAss1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="AviaxAss2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="AviaxAss3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="AviaxAss4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
+        self.userbots = {}
+        self.calls = {}
+        for number, session in sorted(config.STRING_SESSIONS.items()):
+            self.userbots[number] = Client(
+                name=f"AviaxAss{number}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=str(session),
+            )
+            self.calls[number] = PyTgCalls(
+                self.userbots[number],
+                cache_duration=100,
+            )
+        self.sources = {}
+        self.migrations = 0
+        self.failed_migrations = 0
+        quality_policy.watch(self.restream)
+
+    def __getitem__(self, number) -> PyTgCalls:
+        return self.calls[int(number)]
+
+    async def build_stream(
+        self, chat_id: int, link, video=None, params: str = "", live: bool = False
+    ):
+        if live and not video and radio.enabled:
+            self.sources[chat_id] = (link, False)
+            quality_policy.forget(chat_id)
+            # Raw pcm from the shared decoder, pytgcalls does not spawn ffmpeg.
+            return InputStream(
+                InputAudioStream(radio.subscribe(chat_id, link), HighQualityAudio())
+            )
+        radio.leave(chat_id)
+        audio_parameters, video_parameters = await quality_policy.profile(
+            chat_id, video
         )
-        self.userbot5 = Client(
-            name="AviaxAss5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
+        if not video:
+            link = transcoder.playable(link)
+        self.sources[chat_id] = (link, bool(video))
+        if video:
+            return AudioVideoPiped(
+                link,
+                audio_parameters=audio_parameters,
+                video_parameters=video_parameters,
+                additional_ffmpeg_parameters=params,
+            )
+        return AudioPiped(
+            link,
+            audio_parameters=audio_parameters,
+            additional_ffmpeg_parameters=params,
         )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
+
+    async def restream(self, chat_id: int):
+        playing = db.get(chat_id)
+        if not playing or chat_id not in self.sources:
+            return
+        link, video = self.sources[chat_id]
+        file = str(playing[0]["file"])
+        if "live_" in file or "index_" in file:
+            assistant = await group_assistant(self, chat_id)
+            stream = await self.build_stream(chat_id, link, video, live=True)
+            return await assistant.change_stream(chat_id, stream)
+        played = get_position(playing[0])
+        await self.seek_stream(
+            chat_id,
+            link,
+            seconds_to_min(played),
+            playing[0]["dur"],
+            "video" if video else "audio",
         )
+        set_position(playing[0], played)
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         await assistant.pause_stream(chat_id)
+        if db.get(chat_id):
+            pause_position(db[chat_id][0])
 
     async def resume_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
         await assistant.resume_stream(chat_id)
+        if db.get(chat_id):
+            resume_position(db[chat_id][0])
 
     async def stop_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -118,89 +188,61 @@ class Call(PyTgCalls):
             pass
 
     async def stop_stream_force(self, chat_id: int):
-        try:
-            if config.STRING1:
-                await self.one.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_group_call(chat_id)
-        except:
-            pass
+        for call in self.calls.values():
+            try:
+                await call.leave_group_call(chat_id)
+            except:
+                pass
         try:
             await _clear_(chat_id)
         except:
             pass
 
+    async def prerender_speed(self, file_path, speed):
+        base, ext = os.path.splitext(os.path.basename(file_path))
+        out = os.path.join(playback_cache.folder, f"{base}_{speed}x{ext}")
+        if playback_cache.get(out):
+            return out
+        os.makedirs(playback_cache.folder, exist_ok=True)
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg",
+            "-i",
+            file_path,
+            "-filter:v",
+            f"setpts={round(1 / float(speed), 4)}*PTS",
+            "-filter:a",
+            f"atempo={speed}",
+            out,
+            stdin=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        await proc.communicate()
+        if proc.returncode != 0:
+            # Don't leave a truncated render in the cache.
+            if os.path.exists(out):
+                os.remove(out)
+            return None
+        playback_cache.add("speed", None, out)
+        return out
+
     async def speedup_stream(self, chat_id: int, file_path, speed, playing):
         assistant = await group_assistant(self, chat_id)
-        if str(speed) != str("1.0"):
-            base = os.path.basename(file_path)
-            chatdir = os.path.join(os.getcwd(), "playback", str(speed))
-            if not os.path.isdir(chatdir):
-                os.makedirs(chatdir)
-            out = os.path.join(chatdir, base)
-            if not os.path.isfile(out):
-                if str(speed) == str("0.5"):
-                    vs = 2.0
-                if str(speed) == str("0.75"):
-                    vs = 1.35
-                if str(speed) == str("1.5"):
-                    vs = 0.68
-                if str(speed) == str("2.0"):
-                    vs = 0.5
-                proc = await asyncio.create_subprocess_shell(
-                    cmd=(
-                        "ffmpeg "
-                        "-i "
-                        f"{file_path} "
-                        "-filter:v "
-                        f"setpts={vs}*PTS "
-                        "-filter:a "
-                        f"atempo={speed} "
-                        f"{out}"
-                    ),
-                    stdin=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                await proc.communicate()
-            else:
-                pass
+        old_speed = float(playing[0].get("speed") or 1.0)
+        position = int(get_position(playing[0]) * old_speed)
+        total = int(playing[0].get("old_second") or playing[0]["seconds"])
+        out = None
+        if str(speed) != str("1.0") and config.SPEED_PRERENDER:
+            out = await self.prerender_speed(file_path, speed)
+        if out:
+            params = f"-ss {int(position / float(speed))}"
         else:
             out = file_path
-        dur = await asyncio.get_event_loop().run_in_executor(None, check_duration, out)
-        dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
+            params = speed_params(speed, position)
+        params = f"{downloader.ffmpeg_params(out, total - position)} {params}".strip()
+        dur = int(total / float(speed))
         duration = seconds_to_min(dur)
-        stream = (
-            AudioVideoPiped(
-                out,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
-            )
-            if playing[0]["streamtype"] == "video"
-            else AudioPiped(
-                out,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {played} -to {duration}",
-            )
+        stream = await self.build_stream(
+            chat_id, out, playing[0]["streamtype"] == "video", params
         )
         if str(db[chat_id][0]["file"]) == str(file_path):
             await assistant.change_stream(chat_id, stream)
@@ -211,10 +253,10 @@ class Call(PyTgCalls):
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
-            db[chat_id][0]["played"] = con_seconds
+            set_position(db[chat_id][0], position / float(speed))
             db[chat_id][0]["dur"] = duration
             db[chat_id][0]["seconds"] = dur
-            db[chat_id][0]["speed_path"] = out
+            db[chat_id][0]["speed_path"] = out if out != file_path else None
             db[chat_id][0]["speed"] = speed
 
     async def force_stop_stream(self, chat_id: int):
@@ -237,38 +279,158 @@ class Call(PyTgCalls):
         link: str,
         video: Union[bool, str] = None,
         image: Union[bool, str] = None,
+        live: bool = False,
+        seconds: int = None,
     ):
         assistant = await group_assistant(self, chat_id)
-        if video:
-            stream = AudioVideoPiped(
-                link,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-            )
-        else:
-            stream = AudioPiped(link, audio_parameters=HighQualityAudio())
+        stream = await self.build_stream(
+            chat_id, link, video, downloader.ffmpeg_params(link, seconds), live
+        )
         await assistant.change_stream(
             chat_id,
             stream,
         )
+        if db.get(chat_id):
+            set_position(db[chat_id][0])
+
+    def seek_params(self, chat_id, file_path, to_seek, duration) -> str:
+        params = f"-ss {to_seek} -to {duration}"
+        remaining = None
+        playing = db.get(chat_id)
+        if playing and not playing[0].get("speed_path"):
+            speed = playing[0].get("speed") or 1.0
+            if str(speed) != str("1.0"):
+                position = time_to_seconds(to_seek) * float(speed)
+                params = speed_params(speed, position)
+                total = int(playing[0].get("old_second") or playing[0]["seconds"])
+                remaining = total - position
+        return f"{downloader.ffmpeg_params(file_path, remaining)} {params}".strip()
 
     async def seek_stream(self, chat_id, file_path, to_seek, duration, mode):
         assistant = await group_assistant(self, chat_id)
-        stream = (
-            AudioVideoPiped(
-                file_path,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
-            )
-            if mode == "video"
-            else AudioPiped(
-                file_path,
-                audio_parameters=HighQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+        params = self.seek_params(chat_id, file_path, to_seek, duration)
+        stream = await self.build_stream(chat_id, file_path, mode == "video", params)
+        await assistant.change_stream(chat_id, stream)
+
+    async def invite_assistant(self, chat_id: int, number: int):
+        userbot = await get_client(number)
+        try:
+            member = await app.get_chat_member(chat_id, userbot.id)
+            if member.status in (ChatMemberStatus.BANNED, ChatMemberStatus.RESTRICTED):
+                raise AssistantErr(f"Assistant {number} is banned in {chat_id}.")
+            return
+        except UserNotParticipant:
+            pass
+        chat = await app.get_chat(chat_id)
+        invitelink = chat.username or await app.export_chat_invite_link(chat_id)
+        if invitelink.startswith("https://t.me/+"):
+            invitelink = invitelink.replace("https://t.me/+", "https://t.me/joinchat/")
+        try:
+            await userbot.join_chat(invitelink)
+        except InviteRequestSent:
+            await app.approve_chat_join_request(chat_id, userbot.id)
+            await asyncio.sleep(3)
+        except UserAlreadyParticipant:
+            pass
+        try:
+            await self.userbots[number].resolve_peer(chat_id)
+        except:
+            pass
+
+    async def resume_on(self, chat_id: int, number: int):
+        link, video = self.sources[chat_id]
+        playing = db[chat_id]
+        file = str(playing[0]["file"])
+        played = get_position(playing[0])
+        live = "live_" in file or "index_" in file
+        if live:
+            params = ""
+        else:
+            params = self.seek_params(
+                chat_id, link, seconds_to_min(played), playing[0]["dur"]
             )
+        stream = await self.build_stream(chat_id, link, video, params, live)
+        await self.calls[number].join_group_call(
+            chat_id,
+            stream,
+            stream_type=StreamType().pulse_stream,
         )
-        await assistant.change_stream(chat_id, stream)
+        set_position(playing[0], played)
+        if not await is_music_playing(chat_id):
+            await self.calls[number].pause_stream(chat_id)
+            pause_position(playing[0])
+
+    async def migrate(self, chat_id: int, exclude: int = None) -> bool:
+        from AviaxMusic.core.userbot import assistants
+
+        playing = db.get(chat_id)
+        if not playing or chat_id not in self.sources:
+            return False
+        old = sessions.assistant(chat_id)
+        candidates = [
+            number
+            for number in assistants
+            if number not in (old, exclude)
+            and self.userbots[number].is_connected
+            and scheduler.healthy(number)
+        ]
+        if not candidates:
+            self.failed_migrations += 1
+            return False
+        number = scheduler.pick(chat_id, candidates)
+        try:
+            await self.invite_assistant(chat_id, number)
+            # Switch first, so the left event of the old assistant is ignored.
+            sessions.set_assistant(chat_id, number)
+            await set_assistant_new(chat_id, number)
+            if old in self.calls:
+                try:
+                    await self.calls[old].leave_group_call(chat_id)
+                except:
+                    pass
+            await self.resume_on(chat_id, number)
+        except Exception as e:
+            if isinstance(e, FloodWait):
+                scheduler.flood(number, e.value)
+            self.failed_migrations += 1
+            LOGGER(__name__).warning(
+                f"Moving {chat_id} from assistant {old} to {number} failed: {e}"
+            )
+            return False
+        self.migrations += 1
+        LOGGER(__name__).info(f"Moved {chat_id} from assistant {old} to {number}.")
+        return True
+
+    async def drain(self, number: int) -> tuple:
+        moved, failed = 0, 0
+        for chat_id, assistant in sessions.assigned():
+            if assistant != number or not db.get(chat_id):
+                continue
+            if await self.migrate(chat_id, exclude=number):
+                moved += 1
+                continue
+            failed += 1
+            # The chat only still plays if the move failed before the old
+            # assistant left and that one is still connected; otherwise end it
+            # like a lost assistant instead of leaving a dead call active.
+            if (
+                sessions.assistant(chat_id) != number
+                or not self.userbots[number].is_connected
+            ):
+                await self.stop_stream(chat_id)
+        return moved, failed
+
+    def usable(self, number: int) -> bool:
+        return self.userbots[number].is_connected and scheduler.healthy(number)
+
+    async def watchdog(self):
+        while True:
+            await asyncio.sleep(config.MIGRATE_CHECK_INTERVAL)
+            # Disconnected assistants and ones held back by a FloodWait are
+            # drained, the latter keep being retried until the wait expires.
+            for number in list(self.userbots):
+                if not self.usable(number):
+                    await self.drain(number)
 
     async def stream_call(self, link):
         assistant = await group_assistant(self, config.LOG_GROUP_ID)
@@ -287,26 +449,15 @@ class Call(PyTgCalls):
         link,
         video: Union[bool, str] = None,
         image: Union[bool, str] = None,
+        live: bool = False,
+        seconds: int = None,
     ):
         assistant = await group_assistant(self, chat_id)
         language = await get_lang(chat_id)
         _ = get_string(language)
-        if video:
-            stream = AudioVideoPiped(
-                link,
-                audio_parameters=HighQualityAudio(),
-                video_parameters=MediumQualityVideo(),
-            )
-        else:
-            stream = (
-                AudioVideoPiped(
-                    link,
-                    audio_parameters=HighQualityAudio(),
-                    video_parameters=MediumQualityVideo(),
-                )
-                if video
-                else AudioPiped(link, audio_parameters=HighQualityAudio())
-            )
+        stream = await self.build_stream(
+            chat_id, link, video, downloader.ffmpeg_params(link, seconds), live
+        )
         try:
             await assistant.join_group_call(
                 chat_id,
@@ -319,15 +470,31 @@ class Call(PyTgCalls):
             raise AssistantErr(_["call_9"])
         except TelegramServerError:
             raise AssistantErr(_["call_10"])
+        except FloodWait as e:
+            scheduler.flood(await get_assistant_number(chat_id), e.value)
+            raise AssistantErr(_["call_10"])
         await add_active_chat(chat_id)
         await music_on(chat_id)
         if video:
             await add_active_video_chat(chat_id)
         if await is_autoend():
-            counter[chat_id] = {}
             users = len(await assistant.get_participants(chat_id))
             if users == 1:
-                autoend[chat_id] = datetime.now() + timedelta(minutes=1)
+                sessions.set_autoend(chat_id, datetime.now() + timedelta(minutes=1))
+
+    async def now_playing(self, chat_id, track, _, caption, markup, photo=None):
+        if not db.get(chat_id) or db[chat_id][0] is not track:
+            return
+        if photo is None:
+            photo = await gen_thumb(track["vidid"])
+        run = await app.send_photo(
+            chat_id=track["chat_id"],
+            photo=photo,
+            caption=caption,
+            reply_markup=InlineKeyboardMarkup(stream_markup(_, chat_id)),
+        )
+        track["mystic"] = run
+        track["markup"] = markup
 
     async def change_stream(self, client, chat_id):
         check = db.get(chat_id)
@@ -358,7 +525,7 @@ class Call(PyTgCalls):
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
             videoid = check[0]["vidid"]
-            db[chat_id][0]["played"] = 0
+            reset_position(check[0])
             exis = (check[0]).get("old_dur")
             if exis:
                 db[chat_id][0]["dur"] = exis
@@ -373,96 +540,72 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_6"],
                     )
-                if video:
-                    stream = AudioVideoPiped(
-                        link,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                else:
-                    stream = AudioPiped(
-                        link,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                stream = await self.build_stream(chat_id, link, video, live=True)
                 try:
                     await client.change_stream(chat_id, stream)
                 except Exception:
+                    stream_urls.invalidate(videoid)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await gen_thumb(videoid)
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(
-                    chat_id=original_chat_id,
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{videoid}",
-                        title[:23],
-                        check[0]["dur"],
-                        user,
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
+                set_position(check[0])
+                caption = _["stream_1"].format(
+                    f"https://t.me/{app.username}?start=info_{videoid}",
+                    title[:23],
+                    check[0]["dur"],
+                    user,
+                )
+                notifier.post(
+                    chat_id, self.now_playing, chat_id, check[0], _, caption, "tg"
                 )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
             elif "vid_" in queued:
-                mystic = await app.send_message(original_chat_id, _["call_7"])
-                try:
-                    file_path, direct = await YouTube.download(
-                        videoid,
-                        mystic,
-                        videoid=True,
-                        video=True if str(streamtype) == "video" else False,
-                    )
-                except:
-                    return await mystic.edit_text(
-                        _["call_6"], disable_web_page_preview=True
-                    )
-                if video:
-                    stream = AudioVideoPiped(
-                        file_path,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
+                file_path = check[0].get("prefetched")
+                if file_path and os.path.exists(file_path):
+                    mystic = None
                 else:
-                    stream = AudioPiped(
-                        file_path,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                    mystic = await app.send_message(original_chat_id, _["call_7"])
+                    try:
+                        file_path, direct = await YouTube.download(
+                            videoid,
+                            mystic,
+                            videoid=True,
+                            video=True if str(streamtype) == "video" else False,
+                        )
+                    except:
+                        return await mystic.edit_text(
+                            _["call_6"], disable_web_page_preview=True
+                        )
+                    check[0]["prefetched"] = file_path
+                stream = await self.build_stream(
+                    chat_id,
+                    file_path,
+                    video,
+                    downloader.ffmpeg_params(file_path, check[0]["seconds"]),
+                )
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
+                    if str(file_path).startswith("http"):
+                        stream_urls.invalidate(videoid)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await gen_thumb(videoid)
-                button = stream_markup(_, chat_id)
-                await mystic.delete()
-                run = await app.send_photo(
-                    chat_id=original_chat_id,
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{videoid}",
-                        title[:23],
-                        check[0]["dur"],
-                        user,
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
+                set_position(check[0])
+                if mystic:
+                    await mystic.delete()
+                caption = _["stream_1"].format(
+                    f"https://t.me/{app.username}?start=info_{videoid}",
+                    title[:23],
+                    check[0]["dur"],
+                    user,
                 )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
-            elif "index_" in queued:
-                stream = (
-                    AudioVideoPiped(
-                        videoid,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                    if str(streamtype) == "video"
-                    else AudioPiped(videoid, audio_parameters=HighQualityAudio())
+                notifier.post(
+                    chat_id, self.now_playing, chat_id, check[0], _, caption, "stream"
                 )
+            elif "index_" in queued:
+                stream = await self.build_stream(chat_id, videoid, video, live=True)
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
@@ -470,27 +613,19 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_6"],
                     )
-                button = stream_markup(_, chat_id)
-                run = await app.send_photo(
-                    chat_id=original_chat_id,
-                    photo=config.STREAM_IMG_URL,
-                    caption=_["stream_2"].format(user),
-                    reply_markup=InlineKeyboardMarkup(button),
+                set_position(check[0])
+                notifier.post(
+                    chat_id,
+                    self.now_playing,
+                    chat_id,
+                    check[0],
+                    _,
+                    _["stream_2"].format(user),
+                    "tg",
+                    config.STREAM_IMG_URL,
                 )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
             else:
-                if video:
-                    stream = AudioVideoPiped(
-                        queued,
-                        audio_parameters=HighQualityAudio(),
-                        video_parameters=MediumQualityVideo(),
-                    )
-                else:
-                    stream = AudioPiped(
-                        queued,
-                        audio_parameters=HighQualityAudio(),
-                    )
+                stream = await self.build_stream(chat_id, queued, video)
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
@@ -498,104 +633,81 @@ class Call(PyTgCalls):
                         original_chat_id,
                         text=_["call_6"],
                     )
-                if videoid == "telegram":
-                    button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
-                        chat_id=original_chat_id,
-                        photo=config.TELEGRAM_AUDIO_URL
-                        if str(streamtype) == "audio"
-                        else config.TELEGRAM_VIDEO_URL,
-                        caption=_["stream_1"].format(
-                            config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
-                        ),
-                        reply_markup=InlineKeyboardMarkup(button),
+                set_position(check[0])
+                if videoid in ("telegram", "soundcloud"):
+                    if videoid == "soundcloud":
+                        photo = config.SOUNCLOUD_IMG_URL
+                    elif str(streamtype) == "audio":
+                        photo = config.TELEGRAM_AUDIO_URL
+                    else:
+                        photo = config.TELEGRAM_VIDEO_URL
+                    caption = _["stream_1"].format(
+                        config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
                     )
-                    db[chat_id][0]["mystic"] = run
-                    db[chat_id][0]["markup"] = "tg"
-                elif videoid == "soundcloud":
-                    button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
-                        chat_id=original_chat_id,
-                        photo=config.SOUNCLOUD_IMG_URL,
-                        caption=_["stream_1"].format(
-                            config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
-                        ),
-                        reply_markup=InlineKeyboardMarkup(button),
-                    )
-                    db[chat_id][0]["mystic"] = run
-                    db[chat_id][0]["markup"] = "tg"
+                    markup = "tg"
                 else:
-                    img = await gen_thumb(videoid)
-                    button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
-                        chat_id=original_chat_id,
-                        photo=img,
-                        caption=_["stream_1"].format(
-                            f"https://t.me/{app.username}?start=info_{videoid}",
-                            title[:23],
-                            check[0]["dur"],
-                            user,
-                        ),
-                        reply_markup=InlineKeyboardMarkup(button),
+                    photo = None
+                    caption = _["stream_1"].format(
+                        f"https://t.me/{app.username}?start=info_{videoid}",
+                        title[:23],
+                        check[0]["dur"],
+                        user,
                     )
-                    db[chat_id][0]["mystic"] = run
-                    db[chat_id][0]["markup"] = "stream"
+                    markup = "stream"
+                notifier.post(
+                    chat_id,
+                    self.now_playing,
+                    chat_id,
+                    check[0],
+                    _,
+                    caption,
+                    markup,
+                    photo,
+                )
 
     async def ping(self):
         pings = []
-        if config.STRING1:
-            pings.append(await self.one.ping)
-        if config.STRING2:
-            pings.append(await self.two.ping)
-        if config.STRING3:
-            pings.append(await self.three.ping)
-        if config.STRING4:
-            pings.append(await self.four.ping)
-        if config.STRING5:
-            pings.append(await self.five.ping)
+        for call in self.calls.values():
+            pings.append(await call.ping)
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("Starting PyTgCalls Client...\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        for call in self.calls.values():
+            await call.start()
+        if len(self.calls) > 1 and config.MIGRATE_CHECK_INTERVAL:
+            asyncio.create_task(self.watchdog())
 
     async def decorators(self):
-        @self.one.on_kicked()
-        @self.two.on_kicked()
-        @self.three.on_kicked()
-        @self.four.on_kicked()
-        @self.five.on_kicked()
-        @self.one.on_closed_voice_chat()
-        @self.two.on_closed_voice_chat()
-        @self.three.on_closed_voice_chat()
-        @self.four.on_closed_voice_chat()
-        @self.five.on_closed_voice_chat()
-        @self.one.on_left()
-        @self.two.on_left()
-        @self.three.on_left()
-        @self.four.on_left()
-        @self.five.on_left()
         async def stream_services_handler(_, chat_id: int):
             await self.stop_stream(chat_id)
 
-        @self.one.on_stream_end()
-        @self.two.on_stream_end()
-        @self.three.on_stream_end()
-        @self.four.on_stream_end()
-        @self.five.on_stream_end()
-        async def stream_end_handler1(client, update: Update):
+        async def assistant_lost_handler(client, chat_id: int):
+            # Ignore our own leaves and assistants the chat was moved away from.
+            if not await is_active_chat(chat_id):
+                return
+            if self.calls.get(sessions.assistant(chat_id)) is not client:
+                return
+            if not await self.migrate(chat_id):
+                await self.stop_stream(chat_id)
+
+        async def stream_end_handler(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
+            playing = db.get(update.chat_id)
+            link = self.sources.get(update.chat_id, ("", False))[0]
+            if playing and str(link).startswith("http"):
+                # A stream url that expired or got a 403 ends the track early,
+                # the next play of it must resolve a fresh one.
+                if get_position(playing[0]) + EARLY_END < int(playing[0].get("seconds") or 0):
+                    stream_urls.invalidate(playing[0]["vidid"])
             await self.change_stream(client, update.chat_id)
+            prefetcher.schedule(update.chat_id)
 
+        for call in self.calls.values():
+            call.on_kicked()(assistant_lost_handler)
+            call.on_closed_voice_chat()(stream_services_handler)
+            call.on_left()(assistant_lost_handler)
+            call.on_stream_end()(stream_end_handler)
 
 Aviax = Call()
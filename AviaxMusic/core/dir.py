@@ -1,4 +1,7 @@
 import os
+import shutil
+
+import config
 
 from ..logging import LOGGER
 
@@ -16,5 +19,14 @@ def dirr():
         os.mkdir("downloads")
     if "cache" not in os.listdir():
         os.mkdir("cache")
+    if os.path.isdir("radio"):
+        shutil.rmtree("radio")
+    if os.path.isdir("playback"):
+        for name in os.listdir("playback"):
+            path = os.path.join("playback", name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif not config.SPEED_PRERENDER:
+                os.remove(path)
 
     LOGGER(__name__).info("Directories Updated.")
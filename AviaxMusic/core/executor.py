@@ -0,0 +1,175 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+import config
+
+from ..logging import LOGGER
+
+_local = threading.local()
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _progress_hook(_):
+    cancelled = getattr(_local, "cancelled", None)
+    if cancelled is not None and cancelled.is_set():
+        raise JobCancelled("yt-dlp job was cancelled.")
+
+
+# Runs yt-dlp extraction/downloads in a bounded thread pool so they never block
+# the event loop. A thread pool is used instead of a process pool because the
+# jobs are closures over YoutubeDL options and spend their time on network I/O
+# and ffmpeg child processes, not on Python bytecode.
+class Executor:
+    def __init__(self):
+        self.workers = config.YTDL_WORKERS
+        self.queue_size = config.YTDL_QUEUE_SIZE
+        self.timeout = config.YTDL_TIMEOUT
+        self.pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="AviaxYTDL"
+        )
+        self._slots = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def ydl(self, opts: dict) -> yt_dlp.YoutubeDL:
+        opts = dict(opts)
+        opts["progress_hooks"] = list(opts.get("progress_hooks", [])) + [
+            _progress_hook
+        ]
+        return yt_dlp.YoutubeDL(opts)
+
+    async def _acquire(self):
+        if self.slots.locked() and self.waiting >= self.queue_size:
+            self.rejected += 1
+            raise ExecutorBusy("Too many yt-dlp jobs are queued, try again later.")
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def _release(self, *_):
+        self.running -= 1
+        self.slots.release()
+
+    def _count(self, error: BaseException):
+        if isinstance(error, asyncio.TimeoutError):
+            self.timeouts += 1
+        elif isinstance(error, (asyncio.CancelledError, JobCancelled)):
+            self.cancelled += 1
+        else:
+            self.failed += 1
+
+    @staticmethod
+    def _call(cancelled, func, args, kwargs):
+        if cancelled.is_set():
+            raise JobCancelled("yt-dlp job was cancelled before it started.")
+        _local.cancelled = cancelled
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.cancelled = None
+
+    @staticmethod
+    def _retrieve(future):
+        if not future.cancelled():
+            future.exception()
+
+    async def run(self, func, *args, timeout: float = None, **kwargs):
+        await self._acquire()
+        cancelled = threading.Event()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self.pool, self._call, cancelled, func, args, kwargs
+            )
+        except BaseException:
+            self._release()
+            raise
+        # The worker slot is only handed back once the thread really finishes.
+        future.add_done_callback(self._release)
+        future.add_done_callback(self._retrieve)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout or self.timeout
+            )
+        except BaseException as e:
+            cancelled.set()
+            self._count(e)
+            raise
+        self.completed += 1
+        return result
+
+    def _extract(self, url, opts, download):
+        with self.ydl(opts) as ydl:
+            return ydl.extract_info(url, download=download)
+
+    async def extract(
+        self, url, opts: dict, download: bool = False, timeout: float = None
+    ):
+        return await self.run(self._extract, url, opts, download, timeout=timeout)
+
+    async def exec(self, *cmd, timeout: float = None):
+        await self._acquire()
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout or self.timeout
+            )
+        except BaseException as e:
+            self._count(e)
+            raise
+        finally:
+            if proc is not None and proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+            self._release()
+        self.completed += 1
+        return stdout, stderr, proc.returncode
+
+    def shutdown(self):
+        LOGGER(__name__).info("Stopping yt-dlp workers...")
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+
+executor = Executor()
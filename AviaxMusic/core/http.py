@@ -0,0 +1,97 @@
+import aiohttp
+
+import config
+
+from ..logging import LOGGER
+
+
+class HTTPClient:
+    def __init__(self):
+        self._session = None
+        self.requests = 0
+        self.connections = 0
+        self.reused = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def _trace(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connections += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.reused += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self.dns_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self.dns_misses += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_POOL_LIMIT,
+                limit_per_host=config.HTTP_POOL_PER_HOST,
+                ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=config.HTTP_KEEPALIVE,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    connect=config.HTTP_CONNECT_TIMEOUT,
+                    sock_read=config.HTTP_READ_TIMEOUT,
+                ),
+                trace_configs=[self._trace()],
+            )
+        return self._session
+
+    def get(self, url, *args, **kwargs):
+        return self.session.get(url, *args, **kwargs)
+
+    def post(self, url, *args, **kwargs):
+        return self.session.post(url, *args, **kwargs)
+
+    async def start(self):
+        LOGGER(__name__).info(
+            f"Starting HTTP Client (pool {config.HTTP_POOL_LIMIT}, {config.HTTP_POOL_PER_HOST} per host)..."
+        )
+        return self.session
+
+    async def stop(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        connector = self._session.connector if self._session else None
+        acquired = len(getattr(connector, "_acquired", ()))
+        idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return {
+            "limit": config.HTTP_POOL_LIMIT,
+            "per_host": config.HTTP_POOL_PER_HOST,
+            "in_use": acquired,
+            "idle": idle,
+            "hosts": len(getattr(connector, "_conns", {})),
+            "requests": self.requests,
+            "connections": self.connections,
+            "reused": self.reused,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+        }
+
+
+http = HTTPClient()
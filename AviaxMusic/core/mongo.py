@@ -1,14 +1,149 @@
+import threading
+import time
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, monitoring
+from pymongo.errors import OperationFailure
 
 from config import MONGO_DB_URI
 
 from ..logging import LOGGER
 
+# Indexes every collection needs for the lookups in utils/database.py, as
+# (collection, field, unique). Served users/chats, gbans, blocks and the
+# blacklist are also range-scanned on the same field, which the index covers.
+INDEXES = [
+    ("chat_settings", "chat_id", True),
+    ("tgusersdb", "user_id", True),
+    ("chats", "chat_id", True),
+    ("blacklistChat", "chat_id", True),
+    ("gban", "user_id", True),
+    ("blockedusers", "user_id", True),
+    ("onoffper", "on_off", True),
+    ("sudoers", "sudo", True),
+    ("autoend", "chat_id", False),
+    ("autoleave", "chat_id", False),
+]
+
+
+# Records the latency of every query mongo runs, grouped by collection,
+# command and the fields of its filter, and keeps the last filter of each
+# group so the report can explain it and flag collection scans. The events
+# arrive on pymongo's threads, so the shapes are only touched under a lock.
+class QueryProfiler(monitoring.CommandListener):
+    COMMANDS = {"find", "count", "aggregate", "update", "delete", "findAndModify"}
+
+    def __init__(self):
+        self.running = {}
+        self.shapes = {}
+        self.lock = threading.Lock()
+        self.since = time.time()
+
+    @staticmethod
+    def _filter(event) -> dict:
+        command = event.command
+        if event.command_name == "find":
+            return command.get("filter", {})
+        if event.command_name in ("count", "findAndModify"):
+            return command.get("query", {})
+        if event.command_name == "aggregate":
+            stages = command.get("pipeline", [])
+            return stages[0].get("$match", {}) if stages else {}
+        key = "updates" if event.command_name == "update" else "deletes"
+        ops = command.get(key, [])
+        return ops[0].get("q", {}) if ops else {}
+
+    def started(self, event):
+        if event.command_name not in self.COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        query = self._filter(event)
+        shape = (collection, event.command_name, tuple(sorted(query)))
+        self.running[event.request_id] = (shape, query)
+
+    def _finish(self, event):
+        running = self.running.pop(event.request_id, None)
+        if running is None:
+            return
+        shape, query = running
+        ms = event.duration_micros / 1000
+        with self.lock:
+            stats = self.shapes.get(shape)
+            if stats is None:
+                stats = self.shapes[shape] = {"count": 0, "total": 0.0, "max": 0.0}
+            stats["count"] += 1
+            stats["total"] += ms
+            stats["max"] = max(stats["max"], ms)
+            stats["query"] = query
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def slowest(self, limit: int = 10) -> list:
+        with self.lock:
+            snapshot = [(shape, dict(stats)) for shape, stats in self.shapes.items()]
+        shapes = sorted(
+            snapshot,
+            key=lambda item: item[1]["total"] / item[1]["count"],
+            reverse=True,
+        )
+        return shapes[:limit]
+
+    def reset(self):
+        with self.lock:
+            self.shapes.clear()
+            self.since = time.time()
+
+
+query_profiler = QueryProfiler()
+
 LOGGER(__name__).info("Connecting to your Mongo Database...")
 try:
-    _mongo_async_ = AsyncIOMotorClient(MONGO_DB_URI)
+    _mongo_async_ = AsyncIOMotorClient(MONGO_DB_URI, event_listeners=[query_profiler])
     mongodb = _mongo_async_.Yukki
     LOGGER(__name__).info("Connected to your Mongo Database.")
 except:
     LOGGER(__name__).error("Failed to connect to your Mongo Database.")
     exit()
+
+
+async def ensure_indexes():
+    for name, field, unique in INDEXES:
+        collection = mongodb[name]
+        options = {"name": f"{field}_1"}
+        if unique:
+            options["unique"] = True
+            # Documents without the field, like the migration marker in
+            # chat_settings, stay out of the unique index.
+            options["partialFilterExpression"] = {field: {"$exists": True}}
+        try:
+            await collection.create_index([(field, ASCENDING)], **options)
+        except OperationFailure as e:
+            if not unique:
+                LOGGER(__name__).warning(f"Failed to index {name}.{field}: {e}")
+                continue
+            # Duplicates written before the index existed, or an older index
+            # with other options: fall back to a plain index so lookups still
+            # avoid a collection scan.
+            LOGGER(__name__).warning(
+                f"Unique index on {name}.{field} failed, using a plain one: {e}"
+            )
+            try:
+                await collection.create_index(
+                    [(field, ASCENDING)], name=f"{field}_1_plain"
+                )
+            except OperationFailure:
+                pass
+
+
+async def explain(collection: str, query: dict) -> str:
+    plan = await mongodb[collection].find(query).explain()
+    winning = str(plan.get("queryPlanner", {}).get("winningPlan", {}))
+    if "COLLSCAN" in winning:
+        return "COLLSCAN"
+    if "IXSCAN" in winning or "IDHACK" in winning or "EXPRESS" in winning:
+        return "IXSCAN"
+    return "?"
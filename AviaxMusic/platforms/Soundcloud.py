@@ -1,8 +1,9 @@
 from os import path
 
-from yt_dlp import YoutubeDL
-
+from AviaxMusic.core.executor import executor
 from AviaxMusic.utils.formatters import seconds_to_min
+from AviaxMusic.utils.mediacache import media_cache
+from AviaxMusic.utils.singleflight import inflight
 
 
 class SoundAPI:
@@ -22,12 +23,15 @@ class SoundAPI:
             return False
 
     async def download(self, url):
-        d = YoutubeDL(self.opts)
+        return await inflight.do(("soundcloud", url, "audio"), self.fetch, url)
+
+    async def fetch(self, url):
         try:
-            info = d.extract_info(url)
+            info = await executor.extract(url, self.opts, download=True)
         except:
             return False
         xyz = path.join("downloads", f"{info['id']}.{info['ext']}")
+        media_cache.add("soundcloud", info["id"], xyz)
         duration_min = seconds_to_min(info["duration"])
         track_details = {
             "title": info["title"],
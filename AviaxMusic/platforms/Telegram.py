@@ -13,6 +13,8 @@ from AviaxMusic.utils.formatters import (
     get_readable_time,
     seconds_to_min,
 )
+from AviaxMusic.utils.mediacache import media_cache
+from AviaxMusic.utils.singleflight import inflight
 
 
 class TeleAPI:
@@ -96,7 +98,7 @@ class TeleAPI:
         higher = [5, 10, 20, 40, 66, 80, 99]
         checker = [5, 10, 20, 40, 66, 80, 99]
         speed_counter = {}
-        if os.path.exists(fname):
+        if media_cache.get(fname):
             return True
 
         async def down_load():
@@ -166,11 +168,17 @@ class TeleAPI:
             except:
                 await mystic.edit_text(_["tg_3"])
 
-        task = asyncio.create_task(down_load())
-        config.lyrical[mystic.id] = task
-        await task
-        verify = config.lyrical.get(mystic.id)
-        if not verify:
-            return False
-        config.lyrical.pop(mystic.id)
-        return True
+        async def fetch():
+            task = asyncio.create_task(down_load())
+            config.lyrical[mystic.id] = task
+            await task
+            verify = config.lyrical.get(mystic.id)
+            if not verify:
+                return False
+            config.lyrical.pop(mystic.id)
+            media_cache.add("telegram", None, fname)
+            return True
+
+        replied = message.reply_to_message
+        kind = "audio" if replied and (replied.audio or replied.voice) else "video"
+        return await inflight.do(("telegram", os.path.basename(fname), kind), fetch)
@@ -1,15 +1,20 @@
-import asyncio
 import os
 import re
 import json
 from typing import Union
 import requests
-import yt_dlp
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
 from py_yt import VideosSearch
+from AviaxMusic.core.executor import executor
+from AviaxMusic.utils.apijobs import api_jobs
 from AviaxMusic.utils.database import is_on_off
+from AviaxMusic.utils.downloader import downloader
 from AviaxMusic.utils.formatters import time_to_seconds
+from AviaxMusic.utils.mediacache import media_cache
+from AviaxMusic.utils.metacache import VIDEO_ID, meta_cache
+from AviaxMusic.utils.singleflight import inflight
+from AviaxMusic.utils.streamurl import stream_urls
 import os
 import glob
 import random
@@ -18,6 +23,8 @@ import aiohttp
 import config
 from config import API_URL, VIDEO_API_URL, API_KEY
 
+STREAM_FORMAT = "best[height<=?720][width<=?1280]"
+
 
 def cookie_txt_file():
     cookie_dir = f"{os.getcwd()}/cookies"
@@ -33,126 +40,77 @@ def cookie_txt_file():
 async def download_song(link: str):
     video_id = link.split('v=')[-1].split('&')[0]
 
-    download_folder = "downloads"
-    for ext in ["mp3", "m4a", "webm"]:
-        file_path = f"{download_folder}/{video_id}.{ext}"
-        if os.path.exists(file_path):
-            #print(f"File already exists: {file_path}")
-            return file_path
-        
-    song_url = f"{API_URL}/song/{video_id}?api={API_KEY}"
-    async with aiohttp.ClientSession() as session:
-        for attempt in range(10):
-            try:
-                async with session.get(song_url) as response:
-                    if response.status != 200:
-                        raise Exception(f"API request failed with status code {response.status}")
-                
-                    data = await response.json()
-                    status = data.get("status", "").lower()
+    file_path = downloader.lookup(video_id, ["mp3", "m4a", "webm"]) or media_cache.lookup(
+        video_id, ["mp3", "m4a", "webm"]
+    )
+    if file_path:
+        return file_path
+    return await inflight.do(("youtube", video_id, "audio"), fetch_song, video_id)
 
-                    if status == "done":
-                        download_url = data.get("link")
-                        if not download_url:
-                            raise Exception("API response did not provide a download URL.")
-                        break
-                    elif status == "downloading":
-                        await asyncio.sleep(4)
-                    else:
-                        error_msg = data.get("error") or data.get("message") or f"Unexpected status '{status}'"
-                        raise Exception(f"API error: {error_msg}")
-            except Exception as e:
-                print(f"[FAIL] {e}")
-                return None
-        else:
-            print("⏱️ Max retries reached. Still downloading...")
-            return None
+
+async def fetch_song(video_id: str):
+    song_url = f"{API_URL}/song/{video_id}?api={API_KEY}"
+    try:
+        data = await api_jobs.wait(song_url)
+    except Exception as e:
+        print(f"[FAIL] {e}")
+        return None
+    download_url = data.get("link")
     
 
-        try:
-            file_format = data.get("format", "mp3")
-            file_extension = file_format.lower()
-            file_name = f"{video_id}.{file_extension}"
-            download_folder = "downloads"
-            os.makedirs(download_folder, exist_ok=True)
-            file_path = os.path.join(download_folder, file_name)
-
-            async with session.get(download_url) as file_response:
-                with open(file_path, 'wb') as f:
-                    while True:
-                        chunk = await file_response.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                return file_path
-        except aiohttp.ClientError as e:
-            print(f"Network or client error occurred while downloading: {e}")
-            return None
-        except Exception as e:
-            print(f"Error occurred while downloading song: {e}")
-            return None
+    try:
+        file_format = data.get("format", "mp3")
+        file_extension = file_format.lower()
+        file_name = f"{video_id}.{file_extension}"
+        download_folder = "downloads"
+        os.makedirs(download_folder, exist_ok=True)
+        file_path = os.path.join(download_folder, file_name)
+
+        return await downloader.fetch(download_url, file_path, "youtube", video_id)
+    except aiohttp.ClientError as e:
+        print(f"Network or client error occurred while downloading: {e}")
+        return None
+    except Exception as e:
+        print(f"Error occurred while downloading song: {e}")
+        return None
     return None
 
 async def download_video(link: str):
     video_id = link.split('v=')[-1].split('&')[0]
 
-    download_folder = "downloads"
-    for ext in ["mp4", "webm", "mkv"]:
-        file_path = f"{download_folder}/{video_id}.{ext}"
-        if os.path.exists(file_path):
-            return file_path
-        
-    video_url = f"{VIDEO_API_URL}/video/{video_id}?api={API_KEY}"
-    async with aiohttp.ClientSession() as session:
-        for attempt in range(10):
-            try:
-                async with session.get(video_url) as response:
-                    if response.status != 200:
-                        raise Exception(f"API request failed with status code {response.status}")
-                
-                    data = await response.json()
-                    status = data.get("status", "").lower()
+    file_path = downloader.lookup(video_id, ["mp4", "webm", "mkv"]) or media_cache.lookup(
+        video_id, ["mp4", "webm", "mkv"]
+    )
+    if file_path:
+        return file_path
+    return await inflight.do(("youtube", video_id, "video"), fetch_video, video_id)
 
-                    if status == "done":
-                        download_url = data.get("link")
-                        if not download_url:
-                            raise Exception("API response did not provide a download URL.")
-                        break
-                    elif status == "downloading":
-                        await asyncio.sleep(8)
-                    else:
-                        error_msg = data.get("error") or data.get("message") or f"Unexpected status '{status}'"
-                        raise Exception(f"API error: {error_msg}")
-            except Exception as e:
-                print(f"[FAIL] {e}")
-                return None
-        else:
-            print("⏱️ Max retries reached. Still downloading...")
-            return None
+
+async def fetch_video(video_id: str):
+    video_url = f"{VIDEO_API_URL}/video/{video_id}?api={API_KEY}"
+    try:
+        data = await api_jobs.wait(video_url)
+    except Exception as e:
+        print(f"[FAIL] {e}")
+        return None
+    download_url = data.get("link")
     
 
-        try:
-            file_format = data.get("format", "mp4")
-            file_extension = file_format.lower()
-            file_name = f"{video_id}.{file_extension}"
-            download_folder = "downloads"
-            os.makedirs(download_folder, exist_ok=True)
-            file_path = os.path.join(download_folder, file_name)
-
-            async with session.get(download_url) as file_response:
-                with open(file_path, 'wb') as f:
-                    while True:
-                        chunk = await file_response.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                return file_path
-        except aiohttp.ClientError as e:
-            print(f"Network or client error occurred while downloading: {e}")
-            return None
-        except Exception as e:
-            print(f"Error occurred while downloading video: {e}")
-            return None
+    try:
+        file_format = data.get("format", "mp4")
+        file_extension = file_format.lower()
+        file_name = f"{video_id}.{file_extension}"
+        download_folder = "downloads"
+        os.makedirs(download_folder, exist_ok=True)
+        file_path = os.path.join(download_folder, file_name)
+
+        return await downloader.fetch(download_url, file_path, "youtube", video_id)
+    except aiohttp.ClientError as e:
+        print(f"Network or client error occurred while downloading: {e}")
+        return None
+    except Exception as e:
+        print(f"Error occurred while downloading video: {e}")
+        return None
     return None
 
 async def check_file_size(link):
@@ -162,16 +120,17 @@ async def check_file_size(link):
             print("No cookies found. Cannot check file size.")
             return None
             
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", cookie_file,
-            "-J",
-            link,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
+        try:
+            stdout, stderr, returncode = await executor.exec(
+                "yt-dlp",
+                "--cookies", cookie_file,
+                "-J",
+                link,
+            )
+        except Exception as e:
+            print(f"Error: {type(e).__name__} {e}")
+            return None
+        if returncode != 0:
             print(f'Error:\n{stderr.decode()}')
             return None
         return json.loads(stdout.decode())
@@ -195,13 +154,28 @@ async def check_file_size(link):
     total_size = parse_size(formats)
     return total_size
 
-async def shell_cmd(cmd):
-    proc = await asyncio.create_subprocess_shell(
-        cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
+async def resolve_url(link: str, cookie_file: str, fmt: str) -> str:
+    stdout, stderr, _ = await executor.exec(
+        "yt-dlp",
+        "--cookies", cookie_file,
+        "-g",
+        "-f",
+        fmt,
+        f"{link}",
     )
-    out, errorz = await proc.communicate()
+    if not stdout:
+        raise Exception(stderr.decode())
+    return stdout.decode().split("\n")[0]
+
+
+async def stream_url(link: str, cookie_file: str, fmt: str = STREAM_FORMAT) -> str:
+    match = VIDEO_ID.search(link)
+    key = (match.group(1) if match else link, fmt)
+    return await stream_urls.get(key, resolve_url, link, cookie_file, fmt)
+
+
+async def shell_cmd(*cmd):
+    out, errorz, _ = await executor.exec(*cmd)
     if errorz:
         if "unavailable videos are hidden" in (errorz.decode("utf-8")).lower():
             return out.decode("utf-8")
@@ -255,8 +229,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await meta_cache.search(link):
             title = result["title"]
             duration_min = result["duration"]
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
@@ -272,8 +245,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await meta_cache.search(link):
             title = result["title"]
         return title
 
@@ -282,8 +254,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await meta_cache.search(link):
             duration = result["duration"]
         return duration
 
@@ -292,8 +263,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await meta_cache.search(link):
             thumbnail = result["thumbnails"][0]["url"].split("?")[0]
         return thumbnail
 
@@ -316,21 +286,10 @@ class YouTubeAPI:
         if not cookie_file:
             return 0, "No cookies found. Cannot download video."
             
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", cookie_file,
-            "-g",
-            "-f",
-            "best[height<=?720][width<=?1280]",
-            f"{link}",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await proc.communicate()
-        if stdout:
-            return 1, stdout.decode().split("\n")[0]
-        else:
-            return 0, stderr.decode()
+        try:
+            return 1, await stream_url(link, cookie_file)
+        except Exception as e:
+            return 0, str(e)
 
     async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None):
         if videoid:
@@ -342,9 +301,21 @@ class YouTubeAPI:
         if not cookie_file:
             return []
             
-        playlist = await shell_cmd(
-            f"yt-dlp -i --get-id --flat-playlist --cookies {cookie_file} --playlist-end {limit} --skip-download {link}"
-        )
+        try:
+            playlist = await shell_cmd(
+                "yt-dlp",
+                "-i",
+                "--get-id",
+                "--flat-playlist",
+                "--cookies",
+                cookie_file,
+                "--playlist-end",
+                str(limit),
+                "--skip-download",
+                link,
+            )
+        except Exception:
+            return []
         try:
             result = playlist.split("\n")
             for key in result:
@@ -359,8 +330,7 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
+        for result in await meta_cache.search(link):
             title = result["title"]
             duration_min = result["duration"]
             vidid = result["id"]
@@ -386,34 +356,32 @@ class YouTubeAPI:
             return [], link
             
         ytdl_opts = {"quiet": True, "cookiefile" : cookie_file}
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
-        with ydl:
-            formats_available = []
-            r = ydl.extract_info(link, download=False)
-            for format in r["formats"]:
+        r = await executor.extract(link, ytdl_opts)
+        formats_available = []
+        for format in r["formats"]:
+            try:
+                str(format["format"])
+            except:
+                continue
+            if not "dash" in str(format["format"]).lower():
                 try:
-                    str(format["format"])
+                    format["format"]
+                    format["filesize"]
+                    format["format_id"]
+                    format["ext"]
+                    format["format_note"]
                 except:
                     continue
-                if not "dash" in str(format["format"]).lower():
-                    try:
-                        format["format"]
-                        format["filesize"]
-                        format["format_id"]
-                        format["ext"]
-                        format["format_note"]
-                    except:
-                        continue
-                    formats_available.append(
-                        {
-                            "format": format["format"],
-                            "filesize": format["filesize"],
-                            "format_id": format["format_id"],
-                            "ext": format["ext"],
-                            "format_note": format["format_note"],
-                            "yturl": link,
-                        }
-                    )
+                formats_available.append(
+                    {
+                        "format": format["format"],
+                        "filesize": format["filesize"],
+                        "format_id": format["format_id"],
+                        "ext": format["ext"],
+                        "format_note": format["format_note"],
+                        "yturl": link,
+                    }
+                )
         return formats_available, link
 
     async def slider(
@@ -447,7 +415,6 @@ class YouTubeAPI:
     ) -> str:
         if videoid:
             link = self.base + link
-        loop = asyncio.get_running_loop()
         def audio_dl():
             cookie_file = cookie_txt_file()
             if not cookie_file:
@@ -462,7 +429,7 @@ class YouTubeAPI:
                 "cookiefile" : cookie_file,
                 "no_warnings": True,
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
+            x = executor.ydl(ydl_optssx)
             info = x.extract_info(link, False)
             xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
             if os.path.exists(xyz):
@@ -484,7 +451,7 @@ class YouTubeAPI:
                 "cookiefile" : cookie_file,
                 "no_warnings": True,
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
+            x = executor.ydl(ydl_optssx)
             info = x.extract_info(link, False)
             xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
             if os.path.exists(xyz):
@@ -510,7 +477,7 @@ class YouTubeAPI:
                 "prefer_ffmpeg": True,
                 "merge_output_format": "mp4",
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
+            x = executor.ydl(ydl_optssx)
             x.download([link])
 
         def song_audio_dl():
@@ -536,7 +503,7 @@ class YouTubeAPI:
                     }
                 ],
             }
-            x = yt_dlp.YoutubeDL(ydl_optssx)
+            x = executor.ydl(ydl_optssx)
             x.download([link])
 
         if songvideo:
@@ -567,19 +534,12 @@ class YouTubeAPI:
                 direct = True
                 downloaded_file = await download_song(link)
             else:
-                proc = await asyncio.create_subprocess_exec(
-                    "yt-dlp",
-                    "--cookies", cookie_file,
-                    "-g",
-                    "-f",
-                    "best[height<=?720][width<=?1280]",
-                    f"{link}",
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await proc.communicate()
-                if stdout:
-                    downloaded_file = stdout.decode().split("\n")[0]
+                try:
+                    downloaded_file = await stream_url(link, cookie_file)
+                except Exception as e:
+                    print(f"yt-dlp failed: {type(e).__name__} {e}")
+                    downloaded_file = None
+                if downloaded_file:
                     direct = False
                 else:
                    file_size = await check_file_size(link)
@@ -591,7 +551,10 @@ class YouTubeAPI:
                      print(f"File size {total_size_mb:.2f} MB exceeds the 100MB limit.")
                      return None, None
                    direct = True
-                   downloaded_file = await loop.run_in_executor(None, video_dl)
+                   downloaded_file = await inflight.do(
+                       ("yt-dlp", link, "video"), executor.run, video_dl
+                   )
+                   media_cache.add("youtube", None, downloaded_file)
         else:
             direct = True
             downloaded_file = await download_song(link)
@@ -19,9 +19,12 @@ from AviaxMusic.utils.database import (
 )
 from AviaxMusic.utils.decorators.language import languageCB
 from AviaxMusic.utils.formatters import seconds_to_min
-from AviaxMusic.utils.inline import close_markup, stream_markup, stream_markup_timer
+from AviaxMusic.utils.inline import close_markup, stream_markup_timer
 from AviaxMusic.utils.stream.autoclear import auto_clean
-from AviaxMusic.utils.thumbnails import gen_thumb
+from AviaxMusic.utils.stream.notify import notifier
+from AviaxMusic.utils.stream.position import get_position, reset_position
+from AviaxMusic.utils.stream.prefetch import prefetcher
+from AviaxMusic.utils.streamurl import stream_urls
 from config import (
     BANNED_USERS,
     SOUNCLOUD_IMG_URL,
@@ -197,6 +200,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         else:
             txt = f"➻ sᴛʀᴇᴀᴍ ʀᴇ-ᴘʟᴀʏᴇᴅ 🎄\n│ \n└ʙʏ : {mention} 🥀"
         await CallbackQuery.answer()
+        prefetcher.schedule(chat_id)
         queued = check[0]["file"]
         title = (check[0]["title"]).title()
         user = check[0]["by"]
@@ -204,7 +208,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         streamtype = check[0]["streamtype"]
         videoid = check[0]["vidid"]
         status = True if str(streamtype) == "video" else None
-        db[chat_id][0]["played"] = 0
+        reset_position(db[chat_id][0])
         exis = (check[0]).get("old_dur")
         if exis:
             db[chat_id][0]["dur"] = exis
@@ -223,23 +227,21 @@ async def del_back_playlist(client, CallbackQuery, _):
             except:
                 image = None
             try:
-                await Aviax.skip_stream(chat_id, link, video=status, image=image)
+                await Aviax.skip_stream(
+                    chat_id, link, video=status, image=image, live=True
+                )
             except:
+                stream_urls.invalidate(videoid)
                 return await CallbackQuery.message.reply_text(_["call_6"])
-            button = stream_markup(_, chat_id)
-            img = await gen_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
-                photo=img,
-                caption=_["stream_1"].format(
-                    f"https://t.me/{app.username}?start=info_{videoid}",
-                    title[:23],
-                    duration,
-                    user,
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
+            caption = _["stream_1"].format(
+                f"https://t.me/{app.username}?start=info_{videoid}",
+                title[:23],
+                duration,
+                user,
+            )
+            notifier.post(
+                chat_id, Aviax.now_playing, chat_id, check[0], _, caption, "tg"
             )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         elif "vid_" in queued:
             mystic = await CallbackQuery.message.reply_text(
@@ -254,43 +256,47 @@ async def del_back_playlist(client, CallbackQuery, _):
                 )
             except:
                 return await mystic.edit_text(_["call_6"])
+            check[0]["prefetched"] = file_path
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
                 image = None
             try:
-                await Aviax.skip_stream(chat_id, file_path, video=status, image=image)
+                await Aviax.skip_stream(
+                    chat_id,
+                    file_path,
+                    video=status,
+                    image=image,
+                    seconds=check[0]["seconds"],
+                )
             except:
                 return await mystic.edit_text(_["call_6"])
-            button = stream_markup(_, chat_id)
-            img = await gen_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
-                photo=img,
-                caption=_["stream_1"].format(
-                    f"https://t.me/{app.username}?start=info_{videoid}",
-                    title[:23],
-                    duration,
-                    user,
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
+            caption = _["stream_1"].format(
+                f"https://t.me/{app.username}?start=info_{videoid}",
+                title[:23],
+                duration,
+                user,
+            )
+            notifier.post(
+                chat_id, Aviax.now_playing, chat_id, check[0], _, caption, "stream"
             )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "stream"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
             await mystic.delete()
         elif "index_" in queued:
             try:
-                await Aviax.skip_stream(chat_id, videoid, video=status)
+                await Aviax.skip_stream(chat_id, videoid, video=status, live=True)
             except:
                 return await CallbackQuery.message.reply_text(_["call_6"])
-            button = stream_markup(_, chat_id)
-            run = await CallbackQuery.message.reply_photo(
-                photo=STREAM_IMG_URL,
-                caption=_["stream_2"].format(user),
-                reply_markup=InlineKeyboardMarkup(button),
+            notifier.post(
+                chat_id,
+                Aviax.now_playing,
+                chat_id,
+                check[0],
+                _,
+                _["stream_2"].format(user),
+                "tg",
+                STREAM_IMG_URL,
             )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         else:
             if videoid == "telegram":
@@ -306,47 +312,36 @@ async def del_back_playlist(client, CallbackQuery, _):
                 await Aviax.skip_stream(chat_id, queued, video=status, image=image)
             except:
                 return await CallbackQuery.message.reply_text(_["call_6"])
-            if videoid == "telegram":
-                button = stream_markup(_, chat_id)
-                run = await CallbackQuery.message.reply_photo(
-                    photo=TELEGRAM_AUDIO_URL
-                    if str(streamtype) == "audio"
-                    else TELEGRAM_VIDEO_URL,
-                    caption=_["stream_1"].format(
-                        config.SUPPORT_GROUP, title[:23], duration, user
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
-                )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
-            elif videoid == "soundcloud":
-                button = stream_markup(_, chat_id)
-                run = await CallbackQuery.message.reply_photo(
-                    photo=SOUNCLOUD_IMG_URL
-                    if str(streamtype) == "audio"
-                    else TELEGRAM_VIDEO_URL,
-                    caption=_["stream_1"].format(
-                        config.SUPPORT_GROUP, title[:23], duration, user
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
+            if videoid in ("telegram", "soundcloud"):
+                if str(streamtype) != "audio":
+                    photo = TELEGRAM_VIDEO_URL
+                elif videoid == "soundcloud":
+                    photo = SOUNCLOUD_IMG_URL
+                else:
+                    photo = TELEGRAM_AUDIO_URL
+                caption = _["stream_1"].format(
+                    config.SUPPORT_GROUP, title[:23], duration, user
                 )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "tg"
+                markup = "tg"
             else:
-                button = stream_markup(_, chat_id)
-                img = await gen_thumb(videoid)
-                run = await CallbackQuery.message.reply_photo(
-                    photo=img,
-                    caption=_["stream_1"].format(
-                        f"https://t.me/{app.username}?start=info_{videoid}",
-                        title[:23],
-                        duration,
-                        user,
-                    ),
-                    reply_markup=InlineKeyboardMarkup(button),
+                photo = None
+                caption = _["stream_1"].format(
+                    f"https://t.me/{app.username}?start=info_{videoid}",
+                    title[:23],
+                    duration,
+                    user,
                 )
-                db[chat_id][0]["mystic"] = run
-                db[chat_id][0]["markup"] = "stream"
+                markup = "stream"
+            notifier.post(
+                chat_id,
+                Aviax.now_playing,
+                chat_id,
+                check[0],
+                _,
+                caption,
+                markup,
+                photo,
+            )
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
 
 
@@ -382,7 +377,7 @@ async def markup_timer():
                     buttons = stream_markup_timer(
                         _,
                         chat_id,
-                        seconds_to_min(playing[0]["played"]),
+                        seconds_to_min(get_position(playing[0])),
                         playing[0]["dur"],
                     )
                     await mystic.edit_reply_markup(
@@ -0,0 +1,34 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AviaxMusic import app
+from AviaxMusic.core.call import Aviax
+from AviaxMusic.utils.database import get_quality, is_active_chat, set_quality
+from AviaxMusic.utils.decorators import AdminActual
+from AviaxMusic.utils.inline import close_markup
+from AviaxMusic.utils.quality import PROFILES
+from config import BANNED_USERS
+
+
+@app.on_message(filters.command(["quality"]) & filters.group & ~BANNED_USERS)
+@AdminActual
+async def quality_(client, message: Message, _):
+    if len(message.command) != 2:
+        return await message.reply_text(
+            _["admin_41"].format(await get_quality(message.chat.id))
+        )
+    mode = message.command[1].lower()
+    if mode != "auto" and mode not in PROFILES:
+        return await message.reply_text(
+            _["admin_41"].format(await get_quality(message.chat.id))
+        )
+    await set_quality(message.chat.id, mode)
+    if await is_active_chat(message.chat.id):
+        try:
+            await Aviax.restream(message.chat.id)
+        except:
+            pass
+    await message.reply_text(
+        _["admin_42"].format(mode, message.from_user.mention),
+        reply_markup=close_markup(_),
+    )
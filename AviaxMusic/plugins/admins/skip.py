@@ -1,5 +1,5 @@
 from pyrogram import filters
-from pyrogram.types import InlineKeyboardMarkup, Message
+from pyrogram.types import Message
 
 import config
 from AviaxMusic import YouTube, app
@@ -7,9 +7,12 @@ from AviaxMusic.core.call import Aviax
 from AviaxMusic.misc import db
 from AviaxMusic.utils.database import get_loop
 from AviaxMusic.utils.decorators import AdminRightsCheck
-from AviaxMusic.utils.inline import close_markup, stream_markup
+from AviaxMusic.utils.inline import close_markup
 from AviaxMusic.utils.stream.autoclear import auto_clean
-from AviaxMusic.utils.thumbnails import gen_thumb
+from AviaxMusic.utils.stream.notify import notifier
+from AviaxMusic.utils.stream.position import reset_position
+from AviaxMusic.utils.stream.prefetch import prefetcher
+from AviaxMusic.utils.streamurl import stream_urls
 from config import BANNED_USERS
 
 
@@ -89,13 +92,14 @@ async def skip(cli, message: Message, _, chat_id):
                 return await Aviax.stop_stream(chat_id)
             except:
                 return
+    prefetcher.schedule(chat_id)
     queued = check[0]["file"]
     title = (check[0]["title"]).title()
     user = check[0]["by"]
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
+    reset_position(db[chat_id][0])
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
@@ -111,23 +115,17 @@ async def skip(cli, message: Message, _, chat_id):
         except:
             image = None
         try:
-            await Aviax.skip_stream(chat_id, link, video=status, image=image)
+            await Aviax.skip_stream(chat_id, link, video=status, image=image, live=True)
         except:
+            stream_urls.invalidate(videoid)
             return await message.reply_text(_["call_6"])
-        button = stream_markup(_, chat_id)
-        img = await gen_thumb(videoid)
-        run = await message.reply_photo(
-            photo=img,
-            caption=_["stream_1"].format(
-                f"https://t.me/{app.username}?start=info_{videoid}",
-                title[:23],
-                check[0]["dur"],
-                user,
-            ),
-            reply_markup=InlineKeyboardMarkup(button),
+        caption = _["stream_1"].format(
+            f"https://t.me/{app.username}?start=info_{videoid}",
+            title[:23],
+            check[0]["dur"],
+            user,
         )
-        db[chat_id][0]["mystic"] = run
-        db[chat_id][0]["markup"] = "tg"
+        notifier.post(chat_id, Aviax.now_playing, chat_id, check[0], _, caption, "tg")
     elif "vid_" in queued:
         mystic = await message.reply_text(_["call_7"], disable_web_page_preview=True)
         try:
@@ -139,42 +137,46 @@ async def skip(cli, message: Message, _, chat_id):
             )
         except:
             return await mystic.edit_text(_["call_6"])
+        check[0]["prefetched"] = file_path
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
             image = None
         try:
-            await Aviax.skip_stream(chat_id, file_path, video=status, image=image)
+            await Aviax.skip_stream(
+                chat_id,
+                file_path,
+                video=status,
+                image=image,
+                seconds=check[0]["seconds"],
+            )
         except:
             return await mystic.edit_text(_["call_6"])
-        button = stream_markup(_, chat_id)
-        img = await gen_thumb(videoid)
-        run = await message.reply_photo(
-            photo=img,
-            caption=_["stream_1"].format(
-                f"https://t.me/{app.username}?start=info_{videoid}",
-                title[:23],
-                check[0]["dur"],
-                user,
-            ),
-            reply_markup=InlineKeyboardMarkup(button),
+        caption = _["stream_1"].format(
+            f"https://t.me/{app.username}?start=info_{videoid}",
+            title[:23],
+            check[0]["dur"],
+            user,
+        )
+        notifier.post(
+            chat_id, Aviax.now_playing, chat_id, check[0], _, caption, "stream"
         )
-        db[chat_id][0]["mystic"] = run
-        db[chat_id][0]["markup"] = "stream"
         await mystic.delete()
     elif "index_" in queued:
         try:
-            await Aviax.skip_stream(chat_id, videoid, video=status)
+            await Aviax.skip_stream(chat_id, videoid, video=status, live=True)
         except:
             return await message.reply_text(_["call_6"])
-        button = stream_markup(_, chat_id)
-        run = await message.reply_photo(
-            photo=config.STREAM_IMG_URL,
-            caption=_["stream_2"].format(user),
-            reply_markup=InlineKeyboardMarkup(button),
+        notifier.post(
+            chat_id,
+            Aviax.now_playing,
+            chat_id,
+            check[0],
+            _,
+            _["stream_2"].format(user),
+            "tg",
+            config.STREAM_IMG_URL,
         )
-        db[chat_id][0]["mystic"] = run
-        db[chat_id][0]["markup"] = "tg"
     else:
         if videoid == "telegram":
             image = None
@@ -189,44 +191,26 @@ async def skip(cli, message: Message, _, chat_id):
             await Aviax.skip_stream(chat_id, queued, video=status, image=image)
         except:
             return await message.reply_text(_["call_6"])
-        if videoid == "telegram":
-            button = stream_markup(_, chat_id)
-            run = await message.reply_photo(
-                photo=config.TELEGRAM_AUDIO_URL
-                if str(streamtype) == "audio"
-                else config.TELEGRAM_VIDEO_URL,
-                caption=_["stream_1"].format(
-                    config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
-            )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
-        elif videoid == "soundcloud":
-            button = stream_markup(_, chat_id)
-            run = await message.reply_photo(
-                photo=config.SOUNCLOUD_IMG_URL
-                if str(streamtype) == "audio"
-                else config.TELEGRAM_VIDEO_URL,
-                caption=_["stream_1"].format(
-                    config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
+        if videoid in ("telegram", "soundcloud"):
+            if str(streamtype) != "audio":
+                photo = config.TELEGRAM_VIDEO_URL
+            elif videoid == "soundcloud":
+                photo = config.SOUNCLOUD_IMG_URL
+            else:
+                photo = config.TELEGRAM_AUDIO_URL
+            caption = _["stream_1"].format(
+                config.SUPPORT_GROUP, title[:23], check[0]["dur"], user
             )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "tg"
+            markup = "tg"
         else:
-            button = stream_markup(_, chat_id)
-            img = await gen_thumb(videoid)
-            run = await message.reply_photo(
-                photo=img,
-                caption=_["stream_1"].format(
-                    f"https://t.me/{app.username}?start=info_{videoid}",
-                    title[:23],
-                    check[0]["dur"],
-                    user,
-                ),
-                reply_markup=InlineKeyboardMarkup(button),
+            photo = None
+            caption = _["stream_1"].format(
+                f"https://t.me/{app.username}?start=info_{videoid}",
+                title[:23],
+                check[0]["dur"],
+                user,
             )
-            db[chat_id][0]["mystic"] = run
-            db[chat_id][0]["markup"] = "stream"
+            markup = "stream"
+        notifier.post(
+            chat_id, Aviax.now_playing, chat_id, check[0], _, caption, markup, photo
+        )
@@ -3,7 +3,6 @@ import time
 from pyrogram import filters
 from pyrogram.enums import ChatType
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
-from youtubesearchpython.__future__ import VideosSearch
 
 import config
 from AviaxMusic import app
@@ -21,6 +20,7 @@ from AviaxMusic.utils import bot_sys_stats
 from AviaxMusic.utils.decorators.language import LanguageStart
 from AviaxMusic.utils.formatters import get_readable_time
 from AviaxMusic.utils.inline import help_pannel, private_panel, start_panel
+from AviaxMusic.utils.metacache import meta_cache
 from config import BANNED_USERS
 from strings import get_string
 
@@ -85,8 +85,7 @@ async def start_pm(client, message: Message, _):
             m = await message.reply_text("🔎")
             query = (str(name)).replace("info_", "", 1)
             query = f"https://www.youtube.com/watch?v={query}"
-            results = VideosSearch(query, limit=1)
-            for result in (await results.next())["result"]:
+            for result in await meta_cache.search(query):
                 title = result["title"]
                 duration = result["duration"]
                 views = result["viewCount"]["short"]
@@ -5,8 +5,9 @@ from pytgcalls.exceptions import GroupCallNotFound
 import config
 from AviaxMusic import app
 from AviaxMusic.misc import db
-from AviaxMusic.core.call import Aviax, autoend, counter
+from AviaxMusic.core.call import Aviax
 from AviaxMusic.utils.database import get_client, set_loop, is_active_chat, is_autoend, is_autoleave
+from AviaxMusic.utils.sessions import sessions
 import logging
 
 async def auto_leave():
@@ -44,17 +45,15 @@ async def auto_leave():
 asyncio.create_task(auto_leave())
                     
 async def auto_end():
-    global autoend, counter
     while True:
         await asyncio.sleep(60)
         try:
             ender = await is_autoend()
             if not ender:
                 continue
-            chatss = autoend
             keys_to_remove = []
             nocall = False
-            for chat_id in chatss:
+            for chat_id, timer in sessions.autoend():
                 try:
                     users = len(await Aviax.call_listeners(chat_id))
                 except GroupCallNotFound:
@@ -62,7 +61,6 @@ async def auto_end():
                     nocall = True
                 except Exception:
                     users = 100
-                timer = autoend.get(chat_id)
                 if users == 1:
                     res = await set_loop(chat_id, 0)
                     keys_to_remove.append(chat_id)
@@ -80,7 +78,7 @@ async def auto_end():
                     except Exception:
                         pass
             for chat_id in keys_to_remove:
-                del autoend[chat_id]
+                sessions.clear_autoend(chat_id)
         except Exception as e:
             logging.info(e)
 
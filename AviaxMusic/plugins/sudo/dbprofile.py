@@ -0,0 +1,35 @@
+import time
+
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AviaxMusic import app
+from AviaxMusic.core.mongo import explain, query_profiler
+from AviaxMusic.misc import SUDOERS
+
+
+@app.on_message(filters.command(["dbprofile", "slowqueries"]) & SUDOERS)
+async def db_profile(_, message: Message):
+    if len(message.command) == 2 and message.command[1].lower() == "reset":
+        query_profiler.reset()
+        return await message.reply_text("» ǫᴜᴇʀʏ ᴘʀᴏғɪʟᴇ ʀᴇsᴇᴛ.")
+    shapes = query_profiler.slowest()
+    if not shapes:
+        return await message.reply_text("» ɴᴏ ǫᴜᴇʀɪᴇs ʀᴇᴄᴏʀᴅᴇᴅ ʏᴇᴛ.")
+    mystic = await message.reply_text("» ᴘʀᴏғɪʟɪɴɢ ǫᴜᴇʀɪᴇs...")
+    minutes = int((time.time() - query_profiler.since) // 60)
+    lines = [f"<b>» sʟᴏᴡᴇsᴛ ǫᴜᴇʀɪᴇs (ʟᴀsᴛ {minutes} ᴍɪɴ) :</b>\n"]
+    scans = 0
+    for (collection, command, fields), stats in shapes:
+        try:
+            plan = await explain(collection, stats["query"])
+        except Exception:
+            plan = "?"
+        if plan == "COLLSCAN":
+            scans += 1
+        lines.append(
+            f"{'⚠️ ' if plan == 'COLLSCAN' else ''}<code>{collection}.{command}({', '.join(fields) or '*'})</code>\n"
+            f"ᴄᴀʟʟs : <code>{stats['count']}</code> | ᴀᴠɢ : <code>{stats['total'] / stats['count']:.1f}ms</code> | ᴍᴀx : <code>{stats['max']:.1f}ms</code> | ᴘʟᴀɴ : <code>{plan}</code>\n"
+        )
+    lines.append(f"ᴄᴏʟʟᴇᴄᴛɪᴏɴ sᴄᴀɴs : <code>{scans}</code>")
+    await mystic.edit_text("\n".join(lines))
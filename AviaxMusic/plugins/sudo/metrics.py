@@ -0,0 +1,211 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AviaxMusic import app
+from AviaxMusic.core.call import Aviax
+from AviaxMusic.core.executor import executor
+from AviaxMusic.core.http import http
+from AviaxMusic.core.userbot import assistants
+from AviaxMusic.misc import SUDOERS
+from AviaxMusic.utils.apijobs import api_jobs
+from AviaxMusic.utils.database import settings_cache_stats
+from AviaxMusic.utils.downloader import downloader
+from AviaxMusic.utils.formatters import convert_bytes
+from AviaxMusic.utils.mediacache import media_cache
+from AviaxMusic.utils.quality import quality_policy
+from AviaxMusic.utils.scheduler import scheduler
+from AviaxMusic.utils.sessions import sessions
+from AviaxMusic.utils.metacache import meta_cache
+from AviaxMusic.utils.singleflight import inflight
+from AviaxMusic.utils.stream.notify import notifier
+from AviaxMusic.utils.stream.prefetch import prefetcher
+from AviaxMusic.utils.stream.radio import radio
+from AviaxMusic.utils.streamurl import stream_urls
+from AviaxMusic.utils.transcode import transcoder
+from AviaxMusic.utils.writebehind import writer
+
+
+def cache_stats() -> str:
+    stats = media_cache.stats()
+    return (
+        "<b>» ᴍᴇᴅɪᴀ ᴄᴀᴄʜᴇ :</b>\n"
+        f"ғɪʟᴇs : <code>{stats['files']}</code>\n"
+        f"sɪᴢᴇ : <code>{convert_bytes(stats['size']) or '0 B'} / {convert_bytes(stats['limit'])}</code>\n"
+        f"ᴘᴏʟɪᴄʏ : <code>{stats['policy']}</code>\n"
+        f"ʜɪᴛs : <code>{stats['hits']}</code> | ᴍɪssᴇs : <code>{stats['misses']}</code> | ʀᴀᴛɪᴏ : <code>{stats['ratio']}%</code>\n"
+        f"ᴇᴠɪᴄᴛɪᴏɴs : <code>{stats['evictions']}</code> (<code>{convert_bytes(stats['evicted_bytes']) or '0 B'}</code>)\n"
+    )
+
+
+def meta_stats() -> str:
+    stats = meta_cache.stats()
+    return (
+        "<b>» sᴇᴀʀᴄʜ ᴄᴀᴄʜᴇ :</b>\n"
+        f"ᴇɴᴛʀɪᴇs : <code>{stats['entries']}/{stats['limit']}</code> | ʀᴀᴛɪᴏ : <code>{stats['ratio']}%</code>\n"
+        f"ʜɪᴛs : <code>{stats['hits']}</code> | ɴᴇɢᴀᴛɪᴠᴇ : <code>{stats['negative_hits']}</code> | ᴍᴏɴɢᴏ : <code>{stats['stored_hits']}</code>\n"
+        f"ᴍɪssᴇs : <code>{stats['misses']}</code> | ᴄᴏᴀʟᴇsᴄᴇᴅ : <code>{stats['coalesced']}</code>\n"
+    )
+
+
+def url_stats() -> str:
+    stats = stream_urls.stats()
+    return (
+        "<b>» sᴛʀᴇᴀᴍ ᴜʀʟs :</b>\n"
+        f"ᴇɴᴛʀɪᴇs : <code>{stats['entries']}/{stats['limit']}</code> | ʀᴀᴛɪᴏ : <code>{stats['ratio']}%</code>\n"
+        f"ʜɪᴛs : <code>{stats['hits']}</code> | ᴍɪssᴇs : <code>{stats['misses']}</code>\n"
+        f"ʀᴇғʀᴇsʜᴇᴅ : <code>{stats['refreshes']}</code> | ᴇxᴘɪʀᴇᴅ : <code>{stats['expired']}</code>\n"
+    )
+
+
+def download_stats() -> str:
+    stats = inflight.stats()
+    progressive = downloader.stats()
+    return (
+        "<b>» ᴅᴏᴡɴʟᴏᴀᴅs :</b>\n"
+        f"ɪɴ ғʟɪɢʜᴛ : <code>{stats['inflight']}</code>\n"
+        f"sᴛᴀʀᴛᴇᴅ : <code>{stats['started']}</code> | ᴅᴇᴅᴜᴘʟɪᴄᴀᴛᴇᴅ : <code>{stats['shared']}</code>\n"
+        f"ᴘʀᴏɢʀᴇssɪᴠᴇ : <code>{'on' if progressive['enabled'] else 'off'}</code> | ɢʀᴏᴡɪɴɢ : <code>{progressive['growing']}</code>\n"
+        f"ᴇᴀʀʟʏ sᴛᴀʀᴛs : <code>{progressive['early']}</code> | ғᴀʟʟʙᴀᴄᴋs : <code>{progressive['fallbacks']}</code> | ʀᴇsᴜᴍᴇᴅ : <code>{progressive['resumed']}</code>\n"
+    )
+
+
+def transcode_stats() -> str:
+    stats = transcoder.stats()
+    return (
+        "<b>» ᴛʀᴀɴsᴄᴏᴅᴇ :</b>\n"
+        f"sᴛᴀᴛᴜs : <code>{stats['format'] if stats['enabled'] else 'off'}</code> | ʀᴜɴɴɪɴɢ : <code>{stats['running']}/{stats['limit']}</code>\n"
+        f"ᴅᴏɴᴇ : <code>{stats['completed']}</code> | ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code> | sᴇʀᴠᴇᴅ : <code>{stats['served']}</code>\n"
+    )
+
+
+def api_stats() -> str:
+    stats = api_jobs.stats()
+    return (
+        "<b>» ᴀᴘɪ ᴊᴏʙs :</b>\n"
+        f"ᴘᴇɴᴅɪɴɢ : <code>{stats['pending']}/{stats['limit']}</code> | ᴘᴏʟʟs : <code>{stats['polls']}</code>\n"
+        f"ᴅᴏɴᴇ : <code>{stats['completed']}</code> | ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code> | ᴛɪᴍᴇᴅ ᴏᴜᴛ : <code>{stats['timeouts']}</code>\n"
+        f"ʟᴀᴛᴇɴᴄʏ : <code>{stats['avg']}s</code> ᴀᴠɢ | <code>{stats['p95']}s</code> ᴘ95 | <code>{stats['max']}s</code> ᴍᴀx\n"
+    )
+
+
+def prefetch_stats() -> str:
+    stats = prefetcher.stats()
+    return (
+        "<b>» ᴘʀᴇғᴇᴛᴄʜ :</b>\n"
+        f"ʀᴜɴɴɪɴɢ : <code>{stats['running']}</code> | ʟɪᴍɪᴛ : <code>{stats['limit']}</code> | ᴀʜᴇᴀᴅ : <code>{stats['ahead']}</code>\n"
+        f"sᴛᴀʀᴛᴇᴅ : <code>{stats['started']}</code> | ᴅᴏɴᴇ : <code>{stats['completed']}</code> | ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code> | ᴄᴀɴᴄᴇʟʟᴇᴅ : <code>{stats['cancelled']}</code>\n"
+    )
+
+
+def notify_stats() -> str:
+    stats = notifier.stats()
+    return (
+        "<b>» ɴᴏᴛɪғɪᴄᴀᴛɪᴏɴs :</b>\n"
+        f"ᴘᴇɴᴅɪɴɢ : <code>{stats['pending']}</code> | sᴇɴᴛ : <code>{stats['sent']}</code> | ᴄᴏᴀʟᴇsᴄᴇᴅ : <code>{stats['coalesced']}</code>\n"
+        f"ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code> | ғʟᴏᴏᴅᴡᴀɪᴛs : <code>{stats['floods']}</code>\n"
+    )
+
+
+def radio_stats() -> str:
+    stats = radio.stats()
+    return (
+        "<b>» ʀᴀᴅɪᴏ :</b>\n"
+        f"sᴛᴀᴛᴜs : <code>{'on' if stats['enabled'] else 'off'}</code> | sᴇssɪᴏɴs : <code>{stats['sessions']}</code> | ʟɪsᴛᴇɴᴇʀs : <code>{stats['listeners']}</code>\n"
+        f"sʜᴀʀᴇᴅ ᴅᴇᴄᴏᴅᴇs : <code>{stats['shared']}</code> | ᴅʀᴏᴘᴘᴇᴅ : <code>{stats['dropped']}</code>\n"
+        f"ᴄᴘᴜ sᴀᴠᴇᴅ : <code>{stats['saved']}s</code>\n"
+    )
+
+
+def settings_stats() -> str:
+    stats = settings_cache_stats()
+    return (
+        "<b>» ᴄʜᴀᴛ sᴇᴛᴛɪɴɢs :</b>\n"
+        f"ᴇɴᴛʀɪᴇs : <code>{stats['entries']}</code> | sɪᴢᴇ : <code>{convert_bytes(stats['size']) or '0 B'}</code> | ᴘʀᴇʟᴏᴀᴅᴇᴅ : <code>{'yes' if stats['warmed'] else 'no'}</code>\n"
+        f"ʜɪᴛs : <code>{stats['hits']}</code> | ᴍɪssᴇs : <code>{stats['misses']}</code> | ʀᴀᴛɪᴏ : <code>{stats['ratio']}%</code>\n"
+    )
+
+
+def writer_stats() -> str:
+    stats = writer.stats()
+    return (
+        "<b>» ᴅʙ ᴡʀɪᴛᴇs :</b>\n"
+        f"ᴘᴇɴᴅɪɴɢ : <code>{stats['pending']}</code> | ǫᴜᴇᴜᴇᴅ : <code>{stats['queued']}</code> | ᴄᴏᴀʟᴇsᴄᴇᴅ : <code>{stats['coalesced']}</code>\n"
+        f"ᴡʀɪᴛᴛᴇɴ : <code>{stats['written']}</code> | ʙᴀᴛᴄʜᴇs : <code>{stats['batches']}</code> | ᴀᴠɢ : <code>{stats['average']}</code> | ᴍᴀx : <code>{stats['largest']}</code>\n"
+        f"ʟᴀɢ : <code>{stats['lag']}s</code> | ᴍᴀx ʟᴀɢ : <code>{stats['max_lag']}s</code> | ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code>\n"
+    )
+
+
+def http_stats() -> str:
+    stats = http.stats()
+    return (
+        "<b>» ʜᴛᴛᴘ ᴘᴏᴏʟ :</b>\n"
+        f"ɪɴ ᴜsᴇ : <code>{stats['in_use']}/{stats['limit']}</code> | ɪᴅʟᴇ : <code>{stats['idle']}</code> | ʜᴏsᴛs : <code>{stats['hosts']}</code>\n"
+        f"ʀᴇǫᴜᴇsᴛs : <code>{stats['requests']}</code> | ɴᴇᴡ ᴄᴏɴɴᴇᴄᴛɪᴏɴs : <code>{stats['connections']}</code> | ʀᴇᴜsᴇᴅ : <code>{stats['reused']}</code>\n"
+        f"ᴅɴs ᴄᴀᴄʜᴇ : <code>{stats['dns_hits']}</code> ʜɪᴛs / <code>{stats['dns_misses']}</code> ᴍɪssᴇs\n"
+    )
+
+
+def executor_stats() -> str:
+    stats = executor.stats()
+    return (
+        "<b>» ʏᴛ-ᴅʟᴘ ᴡᴏʀᴋᴇʀs :</b>\n"
+        f"ʀᴜɴɴɪɴɢ : <code>{stats['running']}/{stats['workers']}</code> | ǫᴜᴇᴜᴇᴅ : <code>{stats['waiting']}</code>\n"
+        f"ᴅᴏɴᴇ : <code>{stats['completed']}</code> | ғᴀɪʟᴇᴅ : <code>{stats['failed']}</code> | ᴛɪᴍᴇᴅ ᴏᴜᴛ : <code>{stats['timeouts']}</code>\n"
+        f"ᴄᴀɴᴄᴇʟʟᴇᴅ : <code>{stats['cancelled']}</code> | ʀᴇᴊᴇᴄᴛᴇᴅ : <code>{stats['rejected']}</code>\n"
+    )
+
+
+def assistant_stats() -> str:
+    text = "<b>» ᴀssɪsᴛᴀɴᴛs :</b>\n"
+    for x in scheduler.stats(assistants, Aviax.sources):
+        text += (
+            f"{x['assistant']} : <code>{x['audio']}</code> ᴀᴜᴅɪᴏ | <code>{x['video']}</code> ᴠɪᴅᴇᴏ"
+            f" | ʟᴏᴀᴅ <code>{x['load']}</code> | ᴄᴘᴜ <code>{x['cpu']}%</code>"
+        )
+        if x["flood"]:
+            text += f" | ғʟᴏᴏᴅᴡᴀɪᴛ <code>{x['flood']}s</code>"
+        text += "\n"
+    text += f"ᴍɪɢʀᴀᴛᴇᴅ : <code>{Aviax.migrations}</code> | ғᴀɪʟᴇᴅ : <code>{Aviax.failed_migrations}</code>\n"
+    return text
+
+
+def session_stats() -> str:
+    stats = sessions.stats()
+    return (
+        "<b>» sᴇssɪᴏɴs :</b>\n"
+        f"ᴀᴄᴛɪᴠᴇ : <code>{stats['active']}</code> | ᴠɪᴅᴇᴏ : <code>{stats['video']}</code> | ᴘʟᴀʏɪɴɢ : <code>{stats['playing']}</code>\n"
+        f"ᴛʀᴀᴄᴋᴇᴅ ᴄʜᴀᴛs : <code>{stats['known']}</code>\n"
+    )
+
+
+def quality_stats() -> str:
+    stats = quality_policy.stats()
+    return (
+        "<b>» sᴛʀᴇᴀᴍ ǫᴜᴀʟɪᴛʏ :</b>\n"
+        f"ʟᴇᴠᴇʟ : <code>{stats['level']}</code> | ᴍᴀx : <code>{stats['ceiling']}</code> | ᴄᴘᴜ : <code>{stats['cpu']}%</code>\n"
+        f"ʜɪɢʜ : <code>{stats['high']}</code> | ᴍᴇᴅɪᴜᴍ : <code>{stats['medium']}</code> | ʟᴏᴡ : <code>{stats['low']}</code>\n"
+        f"sᴛᴇᴘᴘᴇᴅ ᴅᴏᴡɴ : <code>{stats['stepdowns']}</code>\n"
+    )
+
+
+@app.on_message(filters.command(["metrics", "perf"]) & SUDOERS)
+async def metrics_(_, message: Message):
+    sections = [
+        cache_stats(),
+        meta_stats(),
+        url_stats(),
+        download_stats(),
+        transcode_stats(),
+        api_stats(),
+        prefetch_stats(),
+        notify_stats(),
+        radio_stats(),
+        settings_stats(),
+        writer_stats(),
+        http_stats(),
+        executor_stats(),
+        assistant_stats(),
+        session_stats(),
+        quality_stats(),
+    ]
+    await message.reply_text("\n".join(sections))
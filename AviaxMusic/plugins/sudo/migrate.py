@@ -0,0 +1,22 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from AviaxMusic import app
+from AviaxMusic.core.call import Aviax
+from AviaxMusic.core.userbot import assistants
+from AviaxMusic.misc import SUDOERS
+
+
+@app.on_message(filters.command("migrate") & SUDOERS)
+async def migrate_calls(_, message: Message):
+    usage = f"<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/migrate [ᴀssɪsᴛᴀɴᴛ ɴᴜᴍʙᴇʀ]\n\nᴀssɪsᴛᴀɴᴛs : <code>{', '.join(map(str, assistants))}</code>"
+    if len(message.command) != 2 or not message.command[1].isnumeric():
+        return await message.reply_text(usage)
+    number = int(message.command[1])
+    if number not in assistants:
+        return await message.reply_text(usage)
+    mystic = await message.reply_text(f"» ᴍᴏᴠɪɴɢ ᴀᴄᴛɪᴠᴇ ᴄᴀʟʟs ᴏғғ ᴀssɪsᴛᴀɴᴛ {number}...")
+    moved, failed = await Aviax.drain(number)
+    await mystic.edit_text(
+        f"» ᴍᴏᴠᴇᴅ <code>{moved}</code> ᴄᴀʟʟs ᴏғғ ᴀssɪsᴛᴀɴᴛ {number}, <code>{failed}</code> ғᴀɪʟᴇᴅ."
+    )
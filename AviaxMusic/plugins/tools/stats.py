@@ -16,6 +16,7 @@ from AviaxMusic.plugins import ALL_MODULES
 from AviaxMusic.utils.database import get_served_chats, get_served_users, get_sudoers,is_autoend,is_autoleave
 from AviaxMusic.utils.decorators.language import language, languageCB
 from AviaxMusic.utils.inline.stats import back_stats_buttons, stats_buttons
+from AviaxMusic.utils.scheduler import scheduler
 from config import BANNED_USERS
 
 
@@ -127,6 +128,13 @@ async def bot_stats(client, CallbackQuery, _):
         call["collections"],
         call["objects"],
     )
+    text += _["gstats_6"].format(
+        " | ".join(
+            f"{x['assistant']}: {x['audio'] + x['video']}"
+            for x in scheduler.stats(assistants)
+        )
+        or 0
+    )
     med = InputMediaPhoto(media=config.STATS_IMG_URL, caption=text)
     try:
         await CallbackQuery.edit_message_media(media=med, reply_markup=upl)
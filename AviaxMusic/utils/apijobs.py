@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+
+import config
+from AviaxMusic.core.http import http
+
+
+class Job:
+    __slots__ = ("url", "future", "created", "delay", "next_poll", "polls")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.future = asyncio.get_running_loop().create_future()
+        self.created = time.monotonic()
+        self.delay = config.API_POLL_MIN
+        self.next_poll = self.created
+        self.polls = 0
+
+
+# Owns every pending song/video api job. A single poller checks all jobs that
+# are due in one round, backing off per job while the api is still downloading,
+# and resolves the job future that the requesters are waiting on.
+class APIJobs:
+    def __init__(self):
+        self.jobs = {}
+        self.limit = config.API_MAX_JOBS
+        self.timeout = config.API_JOB_TIMEOUT
+        self._slots = None
+        self._wakeup = None
+        self.task = None
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.polls = 0
+        self.latency = deque(maxlen=200)
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    @property
+    def wakeup(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def wait(self, url: str) -> dict:
+        job = self.jobs.get(url)
+        if job is None:
+            await self.slots.acquire()
+            job = self.jobs.get(url)
+            if job is None:
+                job = Job(url)
+                job.future.add_done_callback(lambda _: self.slots.release())
+                self.jobs[url] = job
+                self.wakeup.set()
+                if self.task is None or self.task.done():
+                    self.task = asyncio.create_task(self._run())
+            else:
+                self.slots.release()
+        return await asyncio.shield(job.future)
+
+    def _finish(self, job: Job, data: dict = None, error: Exception = None):
+        self.jobs.pop(job.url, None)
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+            return
+        self.completed += 1
+        self.latency.append(time.monotonic() - job.created)
+        job.future.set_result(data)
+
+    async def _poll(self, job: Job):
+        job.polls += 1
+        self.polls += 1
+        try:
+            async with http.get(job.url) as response:
+                if response.status != 200:
+                    raise Exception(
+                        f"API request failed with status code {response.status}"
+                    )
+                data = await response.json()
+            status = data.get("status", "").lower()
+            if status == "done":
+                if not data.get("link"):
+                    raise Exception("API response did not provide a download URL.")
+                return self._finish(job, data)
+            if status != "downloading":
+                error_msg = (
+                    data.get("error")
+                    or data.get("message")
+                    or f"Unexpected status '{status}'"
+                )
+                raise Exception(f"API error: {error_msg}")
+        except Exception as e:
+            self.failed += 1
+            return self._finish(job, error=e)
+        now = time.monotonic()
+        if now - job.created > self.timeout:
+            self.timeouts += 1
+            return self._finish(
+                job, error=Exception("Max wait reached. Still downloading...")
+            )
+        job.next_poll = now + job.delay
+        job.delay = min(job.delay * 1.5, config.API_POLL_MAX)
+
+    async def _run(self):
+        while self.jobs:
+            self.wakeup.clear()
+            now = time.monotonic()
+            due = [job for job in self.jobs.values() if job.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll(job) for job in due))
+            if not self.jobs:
+                break
+            wake = min(job.next_poll for job in self.jobs.values())
+            try:
+                await asyncio.wait_for(
+                    self.wakeup.wait(), max(0, wake - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        latency = sorted(self.latency)
+        return {
+            "pending": len(self.jobs),
+            "limit": self.limit,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "polls": self.polls,
+            "avg": round(sum(latency) / len(latency), 1) if latency else 0,
+            "p95": round(latency[int(len(latency) * 0.95) - 1], 1) if latency else 0,
+            "max": round(latency[-1], 1) if latency else 0,
+        }
+
+
+api_jobs = APIJobs()
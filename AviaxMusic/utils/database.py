@@ -1,10 +1,16 @@
-import random
 import asyncio
+import sys
 from datetime import date
 from typing import Dict, List, Union
 
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
 from AviaxMusic import userbot
 from AviaxMusic.core.mongo import mongodb
+from AviaxMusic.utils.scheduler import scheduler
+from AviaxMusic.utils.sessions import sessions
+from AviaxMusic.utils.writebehind import writer
 
 authdb = mongodb.adminauth
 authuserdb = mongodb.authuser
@@ -22,65 +28,202 @@ langdb = mongodb.language
 onoffdb = mongodb.onoffper
 playmodedb = mongodb.playmode
 playtypedb = mongodb.playtypedb
+qualitydb = mongodb.streamquality
+settingsdb = mongodb.chat_settings
 skipdb = mongodb.skipmode
 sudoersdb = mongodb.sudoers
 usersdb = mongodb.tgusersdb
 
 # Shifting to memory [mongo sucks often]
-active = []
-activevideo = []
-assistantdict = {}
-autoend = {}
 autoleave = {}
 count = {}
 channelconnect = {}
 langm = {}
-loop = {}
 maintenance = []
 nonadmin = {}
-pause = {}
 playmode = {}
 playtype = {}
+streamquality = {}
 skipmode = {}
+authusers = {}
+chatassistant = {}
+servedchats = set()
+servedusers = set()
+
+# Every per-chat setting lives in one chat_settings document, so a chat costs
+# one read to load and the write-behind queue merges its setters into one
+# update. Each field is mirrored in its in-memory dict, chats without the
+# field get the default.
+SETTINGS = [
+    (langm, "lang", "en"),
+    (playmode, "playmode", "Direct"),
+    (playtype, "playtype", "Everyone"),
+    (streamquality, "quality", "auto"),
+    (channelconnect, "cmode", None),
+    (count, "upvotes", 5),
+    (skipmode, "skipmode", True),
+    (nonadmin, "nonadmin", False),
+    (authusers, "authusers", None),
+    (chatassistant, "assistant", None),
+]
+# Collections the settings were kept in before, with the field they used.
+# A field of None means only the existence of the document mattered, the
+# last value is what that maps to.
+LEGACY_SETTINGS = [
+    (langdb, "lang", "lang", None),
+    (playmodedb, "mode", "playmode", None),
+    (playtypedb, "mode", "playtype", None),
+    (qualitydb, "mode", "quality", None),
+    (channeldb, "mode", "cmode", None),
+    (countdb, "mode", "upvotes", None),
+    (authuserdb, "notes", "authusers", None),
+    (assdb, "assistant", "assistant", None),
+    (skipdb, None, "skipmode", False),
+    (authdb, None, "nonadmin", True),
+]
+LEGACY_MIGRATED = "legacy_migrated"
+settingscache = {"hits": 0, "misses": 0, "warmed": False, "migrated": False}
+
+
+def _legacy_field(doc: dict, legacy, found):
+    return found if legacy is None else doc[legacy]
+
+
+async def _legacy_settings(chat_id: int) -> dict:
+    fields = {}
+    for collection, legacy, field, found in LEGACY_SETTINGS:
+        doc = await collection.find_one({"chat_id": chat_id}, {"_id": 0})
+        if doc is not None and (legacy is None or legacy in doc):
+            fields[field] = _legacy_field(doc, legacy, found)
+    return fields
+
+
+def _fill_settings(chat_id: int, doc: dict):
+    for cache, field, default in SETTINGS:
+        if field in doc:
+            cache.setdefault(chat_id, doc[field])
+
+
+async def _get_setting(cache: dict, chat_id: int, default):
+    if chat_id in cache:
+        settingscache["hits"] += 1
+        return cache[chat_id]
+    if settingscache["warmed"]:
+        # Every document was loaded at boot, so the chat does not have one.
+        settingscache["hits"] += 1
+        return default
+    settingscache["misses"] += 1
+    doc = await settingsdb.find_one({"chat_id": chat_id}, {"_id": 0}) or {}
+    if not settingscache["migrated"]:
+        # Until the migration went through the chat may only have the old
+        # documents, a value saved in chat_settings since still wins.
+        doc = {**await _legacy_settings(chat_id), **doc}
+    _fill_settings(chat_id, doc)
+    # Remember missing fields as their defaults, so the chat is read only once.
+    for other, _, value in SETTINGS:
+        other.setdefault(chat_id, value)
+    return cache[chat_id]
+
+
+async def _set_setting(chat_id: int, field: str, value):
+    await writer.set(settingsdb, {"chat_id": chat_id}, {field: value})
+
+
+async def migrate_settings():
+    if await settingsdb.find_one({"_id": LEGACY_MIGRATED}):
+        settingscache["migrated"] = True
+        return
+    chats = {}
+    for collection, legacy, field, found in LEGACY_SETTINGS:
+        async for doc in collection.find({}, {"_id": 0}):
+            chat_id = doc.get("chat_id")
+            if chat_id is None or (legacy is not None and legacy not in doc):
+                continue
+            chats.setdefault(chat_id, {})[field] = _legacy_field(doc, legacy, found)
+    # Only fields the chat_settings document lacks are filled, so a rerun
+    # after a failed one keeps whatever was changed in between.
+    ops = [
+        UpdateOne(
+            {"chat_id": chat_id},
+            [
+                {
+                    "$set": {
+                        field: {
+                            "$cond": [
+                                {"$eq": [{"$type": f"${field}"}, "missing"]},
+                                {"$literal": value},
+                                f"${field}",
+                            ]
+                        }
+                        for field, value in fields.items()
+                    }
+                }
+            ],
+            upsert=True,
+        )
+        for chat_id, fields in chats.items()
+    ]
+    failed = 0
+    for i in range(0, len(ops), 1000):
+        try:
+            await settingsdb.bulk_write(ops[i : i + 1000], ordered=False)
+        except BulkWriteError as e:
+            failed += len(e.details.get("writeErrors", [])) or len(ops[i : i + 1000])
+    if failed:
+        # Left unmarked so the next boot runs it again.
+        raise Exception(f"{failed} of {len(ops)} chats failed to migrate.")
+    await settingsdb.insert_one({"_id": LEGACY_MIGRATED, "chats": len(chats)})
+    settingscache["migrated"] = True
+
+
+async def warm_settings():
+    async for doc in settingsdb.find({"chat_id": {"$exists": True}}, {"_id": 0}):
+        _fill_settings(doc["chat_id"], doc)
+    # Chats that were not migrated yet have no document to preload, they keep
+    # being read on a miss.
+    settingscache["warmed"] = settingscache["migrated"]
+
+
+def settings_cache_stats() -> dict:
+    entries = 0
+    size = 0
+    for cache, *_ in SETTINGS:
+        entries += len(cache)
+        size += sys.getsizeof(cache)
+        for chat_id, value in list(cache.items()):
+            size += sys.getsizeof(chat_id) + sys.getsizeof(value)
+    lookups = settingscache["hits"] + settingscache["misses"]
+    return {
+        "entries": entries,
+        "size": size,
+        "warmed": settingscache["warmed"],
+        "hits": settingscache["hits"],
+        "misses": settingscache["misses"],
+        "ratio": round(settingscache["hits"] * 100 / lookups, 1) if lookups else 0,
+    }
 
 
 async def get_assistant_number(chat_id: int) -> str:
-    assistant = assistantdict.get(chat_id)
-    return assistant
+    return sessions.assistant(chat_id)
 
 
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.clients.get(int(assistant))
 
 
 async def set_assistant_new(chat_id, number):
     number = int(number)
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": number}},
-        upsert=True,
-    )
+    chatassistant[chat_id] = number
+    await _set_setting(chat_id, "assistant", number)
 
 
 async def set_assistant(chat_id):
     from AviaxMusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    ran_assistant = scheduler.pick(chat_id, assistants)
+    sessions.set_assistant(chat_id, ran_assistant)
+    chatassistant[chat_id] = ran_assistant
+    await _set_setting(chat_id, "assistant", ran_assistant)
     userbot = await get_client(ran_assistant)
     return userbot
 
@@ -88,117 +231,63 @@ async def set_assistant(chat_id):
 async def get_assistant(chat_id: int) -> str:
     from AviaxMusic.core.userbot import assistants
 
-    assistant = assistantdict.get(chat_id)
-    if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            userbot = await set_assistant(chat_id)
-            return userbot
-        else:
-            got_assis = dbassistant["assistant"]
-            if got_assis in assistants:
-                assistantdict[chat_id] = got_assis
-                userbot = await get_client(got_assis)
-                return userbot
-            else:
-                userbot = await set_assistant(chat_id)
-                return userbot
-    else:
-        if assistant in assistants:
-            userbot = await get_client(assistant)
-            return userbot
-        else:
-            userbot = await set_assistant(chat_id)
-            return userbot
+    assistant = sessions.assistant(chat_id)
+    if assistant is None:
+        assistant = await _get_setting(chatassistant, chat_id, None)
+    # A saved assistant that is no longer configured or running gets replaced.
+    if assistant not in assistants or await get_client(assistant) is None:
+        userbot = await set_assistant(chat_id)
+        return userbot
+    sessions.set_assistant(chat_id, assistant)
+    userbot = await get_client(assistant)
+    return userbot
 
 
 async def set_calls_assistant(chat_id):
     from AviaxMusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
-    assistantdict[chat_id] = ran_assistant
-    await assdb.update_one(
-        {"chat_id": chat_id},
-        {"$set": {"assistant": ran_assistant}},
-        upsert=True,
-    )
+    ran_assistant = scheduler.pick(chat_id, assistants)
+    sessions.set_assistant(chat_id, ran_assistant)
+    chatassistant[chat_id] = ran_assistant
+    await _set_setting(chat_id, "assistant", ran_assistant)
     return ran_assistant
 
 
 async def group_assistant(self, chat_id: int) -> int:
     from AviaxMusic.core.userbot import assistants
 
-    assistant = assistantdict.get(chat_id)
-    if not assistant:
-        dbassistant = await assdb.find_one({"chat_id": chat_id})
-        if not dbassistant:
-            assis = await set_calls_assistant(chat_id)
-        else:
-            assis = dbassistant["assistant"]
-            if assis in assistants:
-                assistantdict[chat_id] = assis
-                assis = assis
-            else:
-                assis = await set_calls_assistant(chat_id)
+    assis = sessions.assistant(chat_id)
+    if assis is None:
+        assis = await _get_setting(chatassistant, chat_id, None)
+    # A saved assistant that is no longer configured or running gets replaced.
+    if assis not in assistants or self.calls.get(int(assis)) is None:
+        assis = await set_calls_assistant(chat_id)
     else:
-        if assistant in assistants:
-            assis = assistant
-        else:
-            assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+        sessions.set_assistant(chat_id, assis)
+    return self.calls.get(int(assis))
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    return await _get_setting(skipmode, chat_id, True)
 
 
 async def skip_on(chat_id: int):
     skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    await _set_setting(chat_id, "skipmode", True)
 
 
 async def skip_off(chat_id: int):
     skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    await _set_setting(chat_id, "skipmode", False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await _get_setting(count, chat_id, 5)
 
 
 async def set_upvotes(chat_id: int, mode: int):
     count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_setting(chat_id, "upvotes", mode)
 
 
 async def is_autoend() -> bool:
@@ -237,179 +326,118 @@ async def autoleave_off():
 
 
 async def get_loop(chat_id: int) -> int:
-    lop = loop.get(chat_id)
-    if not lop:
-        return 0
-    return lop
+    return sessions.loop(chat_id)
 
 
 async def set_loop(chat_id: int, mode: int):
-    loop[chat_id] = mode
+    sessions.set_loop(chat_id, mode)
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await _get_setting(channelconnect, chat_id, None)
 
 
 async def set_cmode(chat_id: int, mode: int):
     channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_setting(chat_id, "cmode", mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await _get_setting(playtype, chat_id, "Everyone")
 
 
 async def set_playtype(chat_id: int, mode: str):
     playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_setting(chat_id, "playtype", mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await _get_setting(playmode, chat_id, "Direct")
 
 
 async def set_playmode(chat_id: int, mode: str):
     playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    await _set_setting(chat_id, "playmode", mode)
+
+
+async def get_quality(chat_id: int) -> str:
+    return await _get_setting(streamquality, chat_id, "auto")
+
+
+async def set_quality(chat_id: int, mode: str):
+    streamquality[chat_id] = mode
+    await _set_setting(chat_id, "quality", mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "en"
-            return "en"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return await _get_setting(langm, chat_id, "en")
 
 
 async def set_lang(chat_id: int, lang: str):
     langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    await _set_setting(chat_id, "lang", lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
-    mode = pause.get(chat_id)
-    if not mode:
-        return False
-    return mode
+    return sessions.is_playing(chat_id)
 
 
 async def music_on(chat_id: int):
-    pause[chat_id] = True
+    sessions.set_playing(chat_id, True)
 
 
 async def music_off(chat_id: int):
-    pause[chat_id] = False
+    sessions.set_playing(chat_id, False)
 
 
 async def get_active_chats() -> list:
-    return active
+    return sessions.active_chats()
 
 
 async def is_active_chat(chat_id: int) -> bool:
-    if chat_id not in active:
-        return False
-    else:
-        return True
+    return sessions.is_active(chat_id)
 
 
 async def add_active_chat(chat_id: int):
-    if chat_id not in active:
-        active.append(chat_id)
+    sessions.activate(chat_id)
 
 
 async def remove_active_chat(chat_id: int):
-    if chat_id in active:
-        active.remove(chat_id)
+    sessions.deactivate(chat_id)
 
 
 async def get_active_video_chats() -> list:
-    return activevideo
+    return sessions.video_chats()
 
 
 async def is_active_video_chat(chat_id: int) -> bool:
-    if chat_id not in activevideo:
-        return False
-    else:
-        return True
+    return sessions.is_video(chat_id)
 
 
 async def add_active_video_chat(chat_id: int):
-    if chat_id not in activevideo:
-        activevideo.append(chat_id)
+    sessions.set_video(chat_id, True)
 
 
 async def remove_active_video_chat(chat_id: int):
-    if chat_id in activevideo:
-        activevideo.remove(chat_id)
+    sessions.set_video(chat_id, False)
 
 
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await is_nonadmin_chat(chat_id)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return await _get_setting(nonadmin, chat_id, False)
 
 
 async def add_nonadmin_chat(chat_id: int):
     nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    await _set_setting(chat_id, "nonadmin", True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
     nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    await _set_setting(chat_id, "nonadmin", False)
 
 
 async def is_on_off(on_off: int) -> bool:
@@ -470,9 +498,12 @@ async def maintenance_on():
 
 
 async def is_served_user(user_id: int) -> bool:
+    if user_id in servedusers:
+        return True
     user = await usersdb.find_one({"user_id": user_id})
     if not user:
         return False
+    servedusers.add(user_id)
     return True
 
 
@@ -487,7 +518,8 @@ async def add_served_user(user_id: int):
     is_served = await is_served_user(user_id)
     if is_served:
         return
-    return await usersdb.insert_one({"user_id": user_id})
+    servedusers.add(user_id)
+    await writer.set(usersdb, {"user_id": user_id}, {"user_id": user_id})
 
 
 async def get_served_chats() -> list:
@@ -498,9 +530,12 @@ async def get_served_chats() -> list:
 
 
 async def is_served_chat(chat_id: int) -> bool:
+    if chat_id in servedchats:
+        return True
     chat = await chatsdb.find_one({"chat_id": chat_id})
     if not chat:
         return False
+    servedchats.add(chat_id)
     return True
 
 
@@ -508,7 +543,8 @@ async def add_served_chat(chat_id: int):
     is_served = await is_served_chat(chat_id)
     if is_served:
         return
-    return await chatsdb.insert_one({"chat_id": chat_id})
+    servedchats.add(chat_id)
+    await writer.set(chatsdb, {"chat_id": chat_id}, {"chat_id": chat_id})
 
 
 async def blacklisted_chats() -> list:
@@ -533,10 +569,10 @@ async def whitelist_chat(chat_id: int) -> bool:
 
 
 async def _get_authusers(chat_id: int) -> Dict[str, int]:
-    _notes = await authuserdb.find_one({"chat_id": chat_id})
-    if not _notes:
-        return {}
-    return _notes["notes"]
+    _notes = await _get_setting(authusers, chat_id, None)
+    if _notes is None:
+        _notes = authusers[chat_id] = {}
+    return _notes
 
 
 async def get_authuser_names(chat_id: int) -> List[str]:
@@ -560,9 +596,7 @@ async def save_authuser(chat_id: int, name: str, note: dict):
     _notes = await _get_authusers(chat_id)
     _notes[name] = note
 
-    await authuserdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"notes": _notes}}, upsert=True
-    )
+    await _set_setting(chat_id, "authusers", dict(_notes))
 
 
 async def delete_authuser(chat_id: int, name: str) -> bool:
@@ -570,11 +604,7 @@ async def delete_authuser(chat_id: int, name: str) -> bool:
     name = name
     if name in notesd:
         del notesd[name]
-        await authuserdb.update_one(
-            {"chat_id": chat_id},
-            {"$set": {"notes": notesd}},
-            upsert=True,
-        )
+        await _set_setting(chat_id, "authusers", dict(notesd))
         return True
     return False
 
@@ -3,6 +3,7 @@ import asyncio
 from pyrogram.enums import ChatMemberStatus
 from pyrogram.errors import (
     ChatAdminRequired,
+    FloodWait,
     InviteRequestSent,
     UserAlreadyParticipant,
     UserNotParticipant,
@@ -13,6 +14,7 @@ from AviaxMusic import YouTube, app
 from AviaxMusic.misc import SUDOERS
 from AviaxMusic.utils.database import (
     get_assistant,
+    get_assistant_number,
     get_cmode,
     get_lang,
     get_playmode,
@@ -21,6 +23,7 @@ from AviaxMusic.utils.database import (
     is_maintenance,
 )
 from AviaxMusic.utils.inline import botplaylist_markup
+from AviaxMusic.utils.scheduler import scheduler
 from config import PLAYLIST_IMG_URL, SUPPORT_GROUP, adminlist
 from strings import get_string
 
@@ -169,6 +172,11 @@ def PlayWrapper(command):
                     await myu.edit(_["call_5"].format(app.mention))
                 except UserAlreadyParticipant:
                     pass
+                except FloodWait as e:
+                    scheduler.flood(await get_assistant_number(chat_id), e.value)
+                    return await message.reply_text(
+                        _["call_3"].format(app.mention, type(e).__name__)
+                    )
                 except Exception as e:
                     return await message.reply_text(
                         _["call_3"].format(app.mention, type(e).__name__)
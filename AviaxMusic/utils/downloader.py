@@ -0,0 +1,183 @@
+import asyncio
+import os
+
+import aiofiles
+import aiohttp
+
+import config
+from AviaxMusic.core.http import http
+from AviaxMusic.utils.mediacache import media_cache
+
+MP4_FORMATS = ("mp4", "m4a", "m4v", "mov", "3gp")
+
+
+class IncompleteDownload(Exception):
+    pass
+
+
+def streamable(path: str, head: bytes) -> bool:
+    if path.rsplit(".", 1)[-1].lower() not in MP4_FORMATS:
+        return True
+    # mp4 can only be played while downloading if the moov box comes before mdat.
+    offset = 0
+    while offset + 8 <= len(head):
+        size = int.from_bytes(head[offset : offset + 4], "big")
+        box = head[offset + 4 : offset + 8]
+        if box == b"moov":
+            return True
+        if box == b"mdat":
+            return False
+        if size == 1 and offset + 16 <= len(head):
+            size = int.from_bytes(head[offset + 8 : offset + 16], "big")
+        if size < 8:
+            return False
+        offset += size
+    return False
+
+
+# Writes remote media into <path>.part and renames it into place once its size
+# matches Content-Length; an interrupted .part is resumed with a Range request.
+# In progressive mode the path is handed back as soon as PROGRESSIVE_BUFFER
+# bytes are on disk, as a symlink to the .part that ffmpeg follows while it
+# grows. The final rename replaces the symlink, so the path stays valid.
+# ffmpeg is given the track length with -t, since a followed file has no end
+# of file and would otherwise only stop once rw_timeout runs out.
+class Downloader:
+    def __init__(self):
+        self.progressive = config.PROGRESSIVE_PLAYBACK
+        self.prefix = config.PROGRESSIVE_BUFFER
+        self.timeout = config.PROGRESSIVE_TIMEOUT
+        self.chunk = config.DOWNLOAD_CHUNK_SIZE
+        self.retries = config.DOWNLOAD_RETRIES
+        self.growing = {}
+        self.early = 0
+        self.fallbacks = 0
+        self.resumed = 0
+
+    def lookup(self, media_id: str, formats: list):
+        for fmt in formats:
+            path = os.path.join(media_cache.folder, f"{media_id}.{fmt}")
+            if os.path.abspath(path) in self.growing:
+                return path
+        return None
+
+    def is_growing(self, path) -> bool:
+        return isinstance(path, str) and os.path.abspath(path) in self.growing
+
+    def ffmpeg_params(self, path, seconds=None) -> str:
+        if not self.is_growing(path):
+            return ""
+        params = f"-follow 1 -rw_timeout {self.timeout * 1000000}"
+        if seconds and int(seconds) > 0:
+            params += f" -t {int(seconds)}"
+        return params
+
+    async def _ready(self, part: str, path: str, ready) -> None:
+        async with aiofiles.open(part, "rb") as f:
+            head = await f.read(65536)
+        if not streamable(path, head):
+            self.fallbacks += 1
+            return ready.set_result(False)
+        if os.path.lexists(path):
+            os.remove(path)
+        os.symlink(os.path.basename(part), path)
+        ready.set_result(True)
+
+    async def _transfer(self, url, part, path, ready=None):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        async with http.get(url, headers=headers) as response:
+            if response.status == 416 and offset:
+                os.remove(part)
+                raise IncompleteDownload("Partial file does not match, starting over.")
+            if response.status not in (200, 206):
+                raise Exception(f"Download failed with status code {response.status}")
+            if response.status == 200 and offset:
+                # The server ignored the Range. Rewriting the .part would cut
+                # it under ffmpeg while it is being played, so give up instead.
+                if ready is not None and ready.done():
+                    raise Exception("Server does not support resuming the download.")
+                offset = 0
+            elif offset:
+                self.resumed += 1
+            expected = None
+            if response.content_length is not None:
+                expected = offset + response.content_length
+            written = offset
+            buffer = bytearray()
+            async with aiofiles.open(part, "ab" if offset else "wb") as f:
+                async for chunk in response.content.iter_chunked(65536):
+                    buffer += chunk
+                    waiting = ready is not None and not ready.done()
+                    if len(buffer) < self.chunk and not (
+                        waiting and written + len(buffer) >= self.prefix
+                    ):
+                        continue
+                    await f.write(bytes(buffer))
+                    written += len(buffer)
+                    buffer.clear()
+                    if ready is not None:
+                        await f.flush()
+                        if waiting and written >= self.prefix:
+                            await self._ready(part, path, ready)
+                if buffer:
+                    await f.write(bytes(buffer))
+                    written += len(buffer)
+        if expected is not None and written != expected:
+            raise IncompleteDownload(f"Expected {expected} bytes, got {written}.")
+
+    async def _write(self, url, path, source, media_id, ready=None):
+        part = f"{path}.part"
+        try:
+            for attempt in range(self.retries):
+                try:
+                    await self._transfer(url, part, path, ready)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, IncompleteDownload):
+                    if attempt == self.retries - 1:
+                        raise
+            os.replace(part, path)
+        except BaseException:
+            if os.path.islink(path):
+                os.remove(path)
+            raise
+        finally:
+            self.growing.pop(os.path.abspath(path), None)
+        media_cache.add(source, media_id, path)
+        return path
+
+    async def fetch(self, url, path, source=None, media_id=None, progressive=None):
+        if progressive is None:
+            progressive = self.progressive
+        if not progressive:
+            return await self._write(url, path, source, media_id)
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(self._write(url, path, source, media_id, ready))
+        self.growing[os.path.abspath(path)] = task
+        task.add_done_callback(self._retrieve)
+        try:
+            await asyncio.wait({task, ready}, return_when=asyncio.FIRST_COMPLETED)
+            if task.done() or not ready.result():
+                return await task
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        self.early += 1
+        return path
+
+    @staticmethod
+    def _retrieve(task):
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.progressive,
+            "growing": len(self.growing),
+            "early": self.early,
+            "fallbacks": self.fallbacks,
+            "resumed": self.resumed,
+        }
+
+
+downloader = Downloader()
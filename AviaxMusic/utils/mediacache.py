@@ -0,0 +1,191 @@
+import os
+import time
+from collections import OrderedDict
+
+import config
+from AviaxMusic.logging import LOGGER
+from AviaxMusic.misc import db
+
+
+class CacheEntry:
+    __slots__ = ("source", "media_id", "fmt", "path", "size", "hits", "last_used")
+
+    def __init__(self, source, media_id, fmt, path, size):
+        self.source = source
+        self.media_id = media_id
+        self.fmt = fmt
+        self.path = path
+        self.size = size
+        self.hits = 0
+        self.last_used = time.time()
+
+
+# Every platform downloader stores files as downloads/<media id>.<format>, so the
+# path itself is the cache key. Files that are playing or queued are never evicted.
+class MediaCache:
+    def __init__(self, folder: str = "downloads", limit: int = None):
+        self.folder = folder
+        self.limit = config.MEDIA_CACHE_LIMIT if limit is None else limit
+        self.policy = config.MEDIA_CACHE_POLICY
+        self.index = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def scan(self):
+        if not os.path.isdir(self.folder):
+            return
+        files = []
+        stale = config.HTTP_READ_TIMEOUT * config.DOWNLOAD_RETRIES
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if os.path.islink(path):
+                # Left behind by a progressive download that never finished.
+                os.remove(path)
+                continue
+            if name.endswith(".part"):
+                # Kept for resuming, unless the download it belongs to is long gone.
+                try:
+                    if time.time() - os.path.getmtime(path) > stale:
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not os.path.isfile(path) or "." not in name:
+                continue
+            files.append((os.path.getmtime(path), path))
+        for _, path in sorted(files):
+            self.add(None, None, path, evict=False)
+        self.evict()
+        LOGGER(__name__).info(
+            f"Media cache loaded {len(self.index)} files ({self.size} bytes) "
+            f"from {self.folder}."
+        )
+
+    def _touch(self, path: str):
+        key = self._key(path)
+        entry = self.index.get(key)
+        if entry is None:
+            if not os.path.isfile(path):
+                return None
+            entry = self.add(None, None, path, evict=False)
+            if entry is None:
+                return None
+        elif not os.path.isfile(path):
+            self.discard(path)
+            return None
+        entry.hits += 1
+        entry.last_used = time.time()
+        self.index.move_to_end(key)
+        return entry
+
+    def get(self, path: str):
+        entry = self._touch(path)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.path
+
+    def lookup(self, media_id: str, formats: list):
+        for fmt in formats:
+            entry = self._touch(os.path.join(self.folder, f"{media_id}.{fmt}"))
+            if entry is not None:
+                self.hits += 1
+                return entry.path
+        self.misses += 1
+        return None
+
+    def add(self, source, media_id, path: str, evict: bool = True):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        name = os.path.basename(path)
+        if media_id is None:
+            media_id = name.rsplit(".", 1)[0]
+        fmt = name.rsplit(".", 1)[-1].lower()
+        key = self._key(path)
+        old = self.index.pop(key, None)
+        if old is not None:
+            self.size -= old.size
+            source = source or old.source
+        entry = CacheEntry(source, media_id, fmt, path, size)
+        if old is not None:
+            entry.hits = old.hits
+        self.index[key] = entry
+        self.size += size
+        if evict:
+            # The file was just handed to the caller, it may be about to play.
+            self.evict(keep=key)
+        return entry
+
+    def discard(self, path: str):
+        entry = self.index.pop(self._key(path), None)
+        if entry is not None:
+            self.size -= entry.size
+        return entry
+
+    def __contains__(self, path) -> bool:
+        return isinstance(path, str) and self._key(path) in self.index
+
+    def pinned(self) -> set:
+        paths = set()
+        for file in config.autoclean:
+            if isinstance(file, str):
+                paths.add(self._key(file))
+        for queue in list(db.values()):
+            for track in list(queue or []):
+                for field in ("file", "speed_path", "prefetched"):
+                    file = track.get(field)
+                    if isinstance(file, str):
+                        paths.add(self._key(file))
+        return paths
+
+    def _victim(self, pinned: set):
+        candidates = (e for k, e in self.index.items() if k not in pinned)
+        if self.policy == "lfu":
+            return min(candidates, key=lambda e: (e.hits, e.last_used), default=None)
+        return next(candidates, None)
+
+    def evict(self, keep: str = None):
+        if self.size <= self.limit:
+            return
+        pinned = self.pinned()
+        if keep is not None:
+            pinned.add(keep)
+        while self.size > self.limit:
+            entry = self._victim(pinned)
+            if entry is None:
+                break
+            self.discard(entry.path)
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            self.evictions += 1
+            self.evicted_bytes += entry.size
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self.index),
+            "size": self.size,
+            "limit": self.limit,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "ratio": round(self.hits * 100 / lookups, 2) if lookups else 0,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+media_cache = MediaCache()
+playback_cache = MediaCache("playback", config.SPEED_CACHE_LIMIT)
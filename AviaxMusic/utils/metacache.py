@@ -0,0 +1,117 @@
+import re
+import time
+from collections import OrderedDict
+
+from py_yt import VideosSearch
+
+import config
+from AviaxMusic.core.mongo import mongodb
+from AviaxMusic.utils.singleflight import SingleFlight
+
+metadb = mongodb.ytmeta
+
+VIDEO_ID = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/|live/)([0-9A-Za-z_-]{11})")
+
+
+# Caches VideosSearch results (limit=1) by video id, or by normalized text for
+# plain queries. Empty results are cached for a shorter time so unknown ids are
+# not searched again on every call.
+class MetadataCache:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.flights = SingleFlight()
+        self.limit = config.META_CACHE_SIZE
+        self.ttl = config.META_CACHE_TTL
+        self.negative_ttl = config.META_CACHE_NEGATIVE_TTL
+        self.persist = config.META_CACHE_PERSIST
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.stored_hits = 0
+
+    @staticmethod
+    def key(query: str) -> str:
+        match = VIDEO_ID.search(query)
+        if match:
+            return f"id:{match.group(1)}"
+        return "q:" + " ".join(query.lower().split())
+
+    def _get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, results = entry
+        if expires < time.time():
+            self.entries.pop(key, None)
+            return None
+        self.entries.move_to_end(key)
+        return results
+
+    def _set(self, key: str, results: list, expires: float = None):
+        if expires is None:
+            expires = time.time() + (self.ttl if results else self.negative_ttl)
+        self.entries[key] = (expires, results)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+
+    async def _load(self, key: str):
+        doc = await metadb.find_one({"_id": key})
+        if not doc or doc["expires"] < time.time():
+            return None
+        self._set(key, doc["results"], doc["expires"])
+        return doc["results"]
+
+    async def _save(self, key: str, results: list):
+        expires, _ = self.entries[key]
+        await metadb.update_one(
+            {"_id": key},
+            {"$set": {"results": results, "expires": expires}},
+            upsert=True,
+        )
+
+    async def _fetch(self, key: str, query: str):
+        if self.persist:
+            results = await self._load(key)
+            if results is not None:
+                self.stored_hits += 1
+                return results
+        self.misses += 1
+        results = (await VideosSearch(query, limit=1).next()).get("result", [])
+        self._set(key, results)
+        keys = [key]
+        if results and key.startswith("q:"):
+            self._set(f"id:{results[0]['id']}", results)
+            keys.append(f"id:{results[0]['id']}")
+        if self.persist:
+            for k in keys:
+                await self._save(k, results)
+        return results
+
+    async def search(self, query: str) -> list:
+        key = self.key(query)
+        results = self._get(key)
+        if results is not None:
+            if results:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            return results
+        return await self.flights.do(key, self._fetch, key, query)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.stored_hits + self.misses
+        served = lookups - self.misses
+        return {
+            "entries": len(self.entries),
+            "limit": self.limit,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "stored_hits": self.stored_hits,
+            "misses": self.misses,
+            "coalesced": self.flights.shared,
+            "ratio": round(served * 100 / lookups, 1) if lookups else 0,
+        }
+
+
+meta_cache = MetadataCache()
@@ -1,16 +1,15 @@
-import aiohttp
+from AviaxMusic.core.http import http
 
 BASE = "https://batbin.me/"
 
 
 async def post(url: str, *args, **kwargs):
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, *args, **kwargs) as resp:
-            try:
-                data = await resp.json()
-            except Exception:
-                data = await resp.text()
-        return data
+    async with http.post(url, *args, **kwargs) as resp:
+        try:
+            data = await resp.json()
+        except Exception:
+            data = await resp.text()
+    return data
 
 
 async def AviaxBin(text):
@@ -0,0 +1,117 @@
+import asyncio
+
+import psutil
+from pytgcalls.types.input_stream.quality import (
+    HighQualityAudio,
+    HighQualityVideo,
+    LowQualityVideo,
+    MediumQualityAudio,
+    MediumQualityVideo,
+)
+
+import config
+
+PROFILES = ["high", "medium", "low"]
+AUDIO = [HighQualityAudio, HighQualityAudio, MediumQualityAudio]
+VIDEO = [HighQualityVideo, MediumQualityVideo, LowQualityVideo]
+
+
+# Picks the audio/video parameters of every stream. The level is the worst of
+# the global QUALITY_MAX, the chat's own /quality setting and the host level,
+# which follows cpu usage and the number of video chats. While the host is
+# overloaded a few running streams per round are restarted one level lower,
+# video chats first, so calls degrade one by one instead of all together.
+# Streams never step back up mid-track, the next track gets the new level.
+class QualityPolicy:
+    def __init__(self):
+        self.ceiling = 1
+        if config.QUALITY_MAX in PROFILES:
+            self.ceiling = PROFILES.index(config.QUALITY_MAX)
+        self.cpu_medium = config.QUALITY_CPU_MEDIUM
+        self.cpu_low = config.QUALITY_CPU_LOW
+        self.video_medium = config.QUALITY_VIDEO_MEDIUM
+        self.video_low = config.QUALITY_VIDEO_LOW
+        self.interval = config.QUALITY_CHECK_INTERVAL
+        self.step = config.QUALITY_STEP_CHATS
+        self.level = self.ceiling
+        self.cpu = 0.0
+        self.current = {}
+        self.stepping = {}
+        self.restream = None
+        self.task = None
+        self.stepdowns = 0
+
+    def host_level(self) -> int:
+        from AviaxMusic.utils.sessions import sessions
+
+        self.cpu = psutil.cpu_percent(None)
+        videos = sessions.video_count()
+        level = 0
+        if self.cpu >= self.cpu_low or videos >= self.video_low:
+            level = 2
+        elif self.cpu >= self.cpu_medium or videos >= self.video_medium:
+            level = 1
+        self.level = max(level, self.ceiling)
+        return self.level
+
+    async def allowed(self, chat_id: int) -> int:
+        from AviaxMusic.utils.database import get_quality
+
+        mode = await get_quality(chat_id)
+        chat = PROFILES.index(mode) if mode in PROFILES else 0
+        return max(self.level, chat)
+
+    async def profile(self, chat_id: int, video: bool = False):
+        level = self.stepping.pop(chat_id, None)
+        if level is None:
+            level = await self.allowed(chat_id)
+        self.current[chat_id] = (level, bool(video))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        return AUDIO[level](), VIDEO[level]()
+
+    def watch(self, restream):
+        self.restream = restream
+
+    def forget(self, chat_id: int):
+        self.current.pop(chat_id, None)
+
+    async def _step_down(self):
+        candidates = []
+        for chat_id, (level, video) in list(self.current.items()):
+            if level < 2 and level < await self.allowed(chat_id):
+                candidates.append((not video, level, chat_id))
+        for _, level, chat_id in sorted(candidates)[: self.step]:
+            self.stepping[chat_id] = level + 1
+            try:
+                await self.restream(chat_id)
+                self.stepdowns += 1
+            except Exception:
+                self.forget(chat_id)
+            finally:
+                self.stepping.pop(chat_id, None)
+
+    async def _run(self):
+        psutil.cpu_percent(None)
+        while self.current:
+            await asyncio.sleep(self.interval)
+            self.host_level()
+            if self.restream is not None:
+                await self._step_down()
+
+    def stats(self) -> dict:
+        levels = [0, 0, 0]
+        for level, _ in self.current.values():
+            levels[level] += 1
+        return {
+            "level": PROFILES[self.level],
+            "ceiling": PROFILES[self.ceiling],
+            "cpu": self.cpu,
+            "high": levels[0],
+            "medium": levels[1],
+            "low": levels[2],
+            "stepdowns": self.stepdowns,
+        }
+
+
+quality_policy = QualityPolicy()
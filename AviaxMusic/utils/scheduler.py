@@ -0,0 +1,134 @@
+import random
+import time
+
+import psutil
+
+import config
+
+
+# Picks the assistant for a chat that has none yet. Load is the number of
+# active calls, with video calls weighted by VIDEO_CALL_WEIGHT since their
+# ffmpeg transcode costs far more CPU, plus chats assigned in the last few
+# minutes that have not started playing yet. Assistants that recently hit a
+# FloodWait are skipped until it expires.
+class AssistantScheduler:
+    def __init__(self):
+        self.video_weight = config.VIDEO_CALL_WEIGHT
+        self.floods = {}
+        self.flood_count = {}
+        self.recent = {}
+        self.ffmpeg = {}
+
+    def flood(self, assistant, seconds):
+        if assistant is None:
+            return
+        assistant = int(assistant)
+        self.floods[assistant] = time.time() + int(seconds)
+        self.flood_count[assistant] = self.flood_count.get(assistant, 0) + 1
+
+    def healthy(self, assistant: int) -> bool:
+        return self.floods.get(assistant, 0) <= time.time()
+
+    def calls(self) -> dict:
+        from AviaxMusic.utils.sessions import sessions
+
+        calls = {}
+        for _, assistant, is_video in sessions.active_assignments():
+            audio, video = calls.get(assistant, (0, 0))
+            if is_video:
+                video += 1
+            else:
+                audio += 1
+            calls[assistant] = (audio, video)
+        return calls
+
+    def load(self, assistants: list) -> dict:
+        from AviaxMusic.utils.sessions import sessions
+
+        now = time.time()
+        for chat_id, (_, assigned) in list(self.recent.items()):
+            if sessions.is_active(chat_id) or now - assigned > 300:
+                self.recent.pop(chat_id, None)
+        calls = self.calls()
+        load = {}
+        for assistant in assistants:
+            audio, video = calls.get(assistant, (0, 0))
+            load[assistant] = audio + video * self.video_weight
+        for assistant, _ in self.recent.values():
+            if assistant in load:
+                load[assistant] += 1
+        return load
+
+    def pick(self, chat_id: int, assistants: list) -> int:
+        load = self.load(assistants)
+        healthy = [a for a in assistants if self.healthy(a)]
+        if not healthy:
+            assistant = min(assistants, key=lambda a: self.floods.get(a, 0))
+        else:
+            lowest = min(load[a] for a in healthy)
+            assistant = random.choice([a for a in healthy if load[a] == lowest])
+        self.recent[chat_id] = (assistant, time.time())
+        return assistant
+
+    def ffmpeg_cpu(self) -> list:
+        try:
+            children = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            return []
+        usage = []
+        seen = {}
+        for proc in children:
+            try:
+                if "ffmpeg" not in proc.name():
+                    continue
+                proc = self.ffmpeg.get(proc.pid, proc)
+                usage.append((proc.cpu_percent(None), proc.cmdline()))
+                seen[proc.pid] = proc
+            except psutil.Error:
+                continue
+        self.ffmpeg = seen
+        return usage
+
+    def assistant_cpu(self, sources: dict) -> dict:
+        # pytgcalls runs one ffmpeg per call with the played source as its
+        # input, so each process is charged to the assistant of the chat that
+        # plays that source. Shared radio decoders and renders are not calls.
+        from AviaxMusic.utils.sessions import sessions
+
+        inputs = {}
+        for chat_id, assistant, _ in sessions.active_assignments():
+            source = sources.get(chat_id)
+            if source:
+                inputs.setdefault(str(source[0]), assistant)
+        cpu = {}
+        for percent, cmdline in self.ffmpeg_cpu():
+            for arg in cmdline:
+                if arg in inputs:
+                    assistant = inputs[arg]
+                    cpu[assistant] = cpu.get(assistant, 0.0) + percent
+                    break
+        return cpu
+
+    def stats(self, assistants: list, sources: dict) -> list:
+        calls = self.calls()
+        load = self.load(assistants)
+        cpu = self.assistant_cpu(sources)
+        now = time.time()
+        stats = []
+        for assistant in assistants:
+            audio, video = calls.get(assistant, (0, 0))
+            stats.append(
+                {
+                    "assistant": assistant,
+                    "audio": audio,
+                    "video": video,
+                    "load": load[assistant],
+                    "cpu": round(cpu.get(assistant, 0.0), 1),
+                    "flood": max(0, int(self.floods.get(assistant, 0) - now)),
+                    "floods": self.flood_count.get(assistant, 0),
+                }
+            )
+        return stats
+
+
+scheduler = AssistantScheduler()
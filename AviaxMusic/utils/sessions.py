@@ -0,0 +1,167 @@
+import time
+
+
+class Session:
+    __slots__ = (
+        "chat_id",
+        "active",
+        "playing",
+        "video",
+        "loop",
+        "assistant",
+        "autoend",
+        "started",
+        "updated",
+    )
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        self.active = False
+        self.playing = False
+        self.video = False
+        self.loop = 0
+        self.assistant = None
+        self.autoend = None
+        self.started = None
+        self.updated = time.time()
+
+
+# Voice chat state of every chat the bot has seen, one slotted Session per
+# chat. Active and video chats are also indexed in insertion-ordered dicts,
+# so checks are O(1) and listing them does not walk every known chat. A
+# session outlives its call only while it holds the assigned assistant for
+# the next one or a loop setting; otherwise it is dropped when the call ends.
+class ActiveSessionRegistry:
+    def __init__(self):
+        self.sessions = {}
+        self.active = {}
+        self.video = {}
+
+    def get(self, chat_id: int) -> Session:
+        return self.sessions.get(chat_id)
+
+    def session(self, chat_id: int) -> Session:
+        session = self.sessions.get(chat_id)
+        if session is None:
+            session = self.sessions[chat_id] = Session(chat_id)
+        return session
+
+    def _touch(self, session: Session):
+        session.updated = time.time()
+
+    def is_active(self, chat_id: int) -> bool:
+        return chat_id in self.active
+
+    def is_video(self, chat_id: int) -> bool:
+        return chat_id in self.video
+
+    def active_chats(self) -> list:
+        return list(self.active)
+
+    def video_chats(self) -> list:
+        return list(self.video)
+
+    def active_count(self) -> int:
+        return len(self.active)
+
+    def video_count(self) -> int:
+        return len(self.video)
+
+    def activate(self, chat_id: int):
+        session = self.session(chat_id)
+        if not session.active:
+            session.active = True
+            session.started = time.time()
+            self.active[chat_id] = session
+        self._touch(session)
+
+    def deactivate(self, chat_id: int):
+        session = self.sessions.get(chat_id)
+        if session is None:
+            return
+        self.active.pop(chat_id, None)
+        self.video.pop(chat_id, None)
+        session.active = False
+        session.playing = False
+        session.video = False
+        session.autoend = None
+        session.started = None
+        self._touch(session)
+        if session.assistant is None and not session.loop:
+            self.sessions.pop(chat_id, None)
+
+    def set_video(self, chat_id: int, video: bool):
+        session = self.session(chat_id) if video else self.sessions.get(chat_id)
+        if session is None:
+            return
+        session.video = video
+        if video:
+            self.video[chat_id] = session
+        else:
+            self.video.pop(chat_id, None)
+        self._touch(session)
+
+    def is_playing(self, chat_id: int) -> bool:
+        session = self.sessions.get(chat_id)
+        return session.playing if session else False
+
+    def set_playing(self, chat_id: int, playing: bool):
+        session = self.session(chat_id)
+        session.playing = playing
+        self._touch(session)
+
+    def loop(self, chat_id: int) -> int:
+        session = self.sessions.get(chat_id)
+        return session.loop if session else 0
+
+    def set_loop(self, chat_id: int, count: int):
+        session = self.session(chat_id)
+        session.loop = count
+        self._touch(session)
+
+    def assistant(self, chat_id: int):
+        session = self.sessions.get(chat_id)
+        return session.assistant if session else None
+
+    def set_assistant(self, chat_id: int, assistant: int):
+        self.session(chat_id).assistant = assistant
+
+    def assigned(self) -> list:
+        return [
+            (chat_id, session.assistant)
+            for chat_id, session in list(self.sessions.items())
+            if session.assistant is not None
+        ]
+
+    def active_assignments(self) -> list:
+        return [
+            (chat_id, session.assistant, session.video)
+            for chat_id, session in list(self.active.items())
+            if session.assistant is not None
+        ]
+
+    def set_autoend(self, chat_id: int, deadline):
+        self.session(chat_id).autoend = deadline
+
+    def autoend(self) -> list:
+        return [
+            (chat_id, session.autoend)
+            for chat_id, session in list(self.active.items())
+            if session.autoend is not None
+        ]
+
+    def clear_autoend(self, chat_id: int):
+        session = self.sessions.get(chat_id)
+        if session is not None:
+            session.autoend = None
+
+    def stats(self) -> dict:
+        return {
+            "known": len(self.sessions),
+            "active": len(self.active),
+            "video": len(self.video),
+            "playing": sum(1 for s in list(self.active.values()) if s.playing),
+        }
+
+
+sessions = ActiveSessionRegistry()
@@ -0,0 +1,45 @@
+import asyncio
+
+
+# Concurrent requests for the same key share a single running fetch. The fetch
+# is shielded so one requester giving up does not cancel it for the others, it
+# is only cancelled once every requester has given up on it.
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.waiters = {}
+        self.started = 0
+        self.shared = 0
+
+    def _done(self, key, future):
+        if self.calls.get(key) is future:
+            self.calls.pop(key)
+
+    async def do(self, key, func, *args, **kwargs):
+        future = self.calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self.calls[key] = future
+            future.add_done_callback(lambda fut: self._done(key, fut))
+            self.started += 1
+        else:
+            self.shared += 1
+        self.waiters[future] = self.waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self.waiters[future] -= 1
+            if not self.waiters[future]:
+                self.waiters.pop(future)
+                if not future.done():
+                    future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "inflight": len(self.calls),
+            "started": self.started,
+            "shared": self.shared,
+        }
+
+
+inflight = SingleFlight()
@@ -0,0 +1,63 @@
+import asyncio
+
+from pyrogram.errors import FloodWait
+
+import config
+
+
+# Sends now playing messages in the background, one worker per chat so they
+# stay in order. A notification waits NOTIFY_DELAY seconds before it is sent
+# and is replaced by any newer one for the same chat meanwhile, so a burst of
+# skips only posts the track that ended up playing.
+class Notifier:
+    def __init__(self):
+        self.delay = config.NOTIFY_DELAY
+        self.pending = {}
+        self.tasks = {}
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.floods = 0
+
+    def post(self, chat_id: int, func, *args):
+        if chat_id in self.pending:
+            self.coalesced += 1
+        self.pending[chat_id] = (func, args)
+        task = self.tasks.get(chat_id)
+        if task is None or task.done():
+            self.tasks[chat_id] = asyncio.create_task(self._run(chat_id))
+
+    def cancel(self, chat_id: int):
+        self.pending.pop(chat_id, None)
+
+    async def _run(self, chat_id: int):
+        try:
+            while chat_id in self.pending:
+                await asyncio.sleep(self.delay)
+                if chat_id not in self.pending:
+                    break
+                func, args = self.pending.pop(chat_id)
+                try:
+                    await func(*args)
+                    self.sent += 1
+                except FloodWait as e:
+                    self.floods += 1
+                    self.pending.setdefault(chat_id, (func, args))
+                    await asyncio.sleep(e.value)
+                except Exception:
+                    self.failed += 1
+        finally:
+            if self.tasks.get(chat_id) is asyncio.current_task():
+                self.tasks.pop(chat_id)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "floods": self.floods,
+        }
+
+
+notifier = Notifier()
@@ -0,0 +1,34 @@
+import time
+
+
+# The playback position of a queue entry is "played" seconds at the moment
+# "started" was taken from the monotonic clock, plus the time since then while
+# the stream is running. Seeks, speed changes and pauses move the anchor, so
+# the position is always computed on demand instead of being ticked.
+def get_position(track: dict) -> int:
+    played = track.get("played", 0)
+    seconds = int(track.get("seconds") or 0)
+    started = track.get("started")
+    if not seconds or started is None:
+        return int(played)
+    return int(min(played + time.monotonic() - started, seconds))
+
+
+def set_position(track: dict, played: int = 0):
+    track["played"] = max(0, int(played))
+    track["started"] = time.monotonic()
+
+
+def pause_position(track: dict):
+    track["played"] = get_position(track)
+    track["started"] = None
+
+
+def resume_position(track: dict):
+    if track.get("started") is None:
+        track["started"] = time.monotonic()
+
+
+def reset_position(track: dict):
+    track["played"] = 0
+    track["started"] = None
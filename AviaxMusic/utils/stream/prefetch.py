@@ -0,0 +1,84 @@
+import asyncio
+
+import config
+from AviaxMusic import YouTube
+from AviaxMusic.misc import db
+
+
+# Downloads the upcoming vid_ tracks of a queue in the background so that
+# change_stream can start them right away. The downloaded path is stored on the
+# queue entry itself, so skipped or removed entries simply take it with them.
+class Prefetcher:
+    def __init__(self):
+        self.ahead = config.PREFETCH_AHEAD
+        self.limit = config.PREFETCH_LIMIT
+        self.tasks = {}
+        self._slots = None
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    @staticmethod
+    def _key(chat_id: int, track: dict):
+        return chat_id, track["vidid"], str(track["streamtype"]) == "video"
+
+    def schedule(self, chat_id: int):
+        if self.ahead < 1:
+            return
+        queue = list(db.get(chat_id) or [])[: self.ahead + 1]
+        keep = {self._key(chat_id, track) for track in queue}
+        for key, task in list(self.tasks.items()):
+            if key[0] == chat_id and key not in keep:
+                task.cancel()
+        for track in queue[1:]:
+            if "vid_" not in str(track.get("file")) or "prefetched" in track:
+                continue
+            key = self._key(chat_id, track)
+            if key in self.tasks:
+                continue
+            self.tasks[key] = asyncio.create_task(self._run(key, track))
+            self.started += 1
+
+    def cancel(self, chat_id: int):
+        for key, task in list(self.tasks.items()):
+            if key[0] == chat_id:
+                task.cancel()
+
+    async def _run(self, key, track: dict):
+        _, vidid, video = key
+        try:
+            async with self.slots:
+                file_path, direct = await YouTube.download(
+                    vidid, None, videoid=True, video=video
+                )
+            track["prefetched"] = file_path if direct else None
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+        except Exception:
+            track["prefetched"] = None
+            self.failed += 1
+        finally:
+            if self.tasks.get(key) is asyncio.current_task():
+                self.tasks.pop(key)
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self.tasks),
+            "limit": self.limit,
+            "ahead": self.ahead,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+prefetcher = Prefetcher()
@@ -3,6 +3,8 @@ from typing import Union
 
 from AviaxMusic.misc import db
 from AviaxMusic.utils.formatters import check_duration, seconds_to_min
+from AviaxMusic.utils.stream.position import set_position
+from AviaxMusic.utils.stream.prefetch import prefetcher
 from config import autoclean, time_to_seconds
 
 
@@ -44,7 +46,10 @@ async def put_queue(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
+    if db[chat_id][0] is put:
+        set_position(put)
     autoclean.append(file)
+    prefetcher.schedule(chat_id)
 
 
 async def put_queue_index(
@@ -89,3 +94,5 @@ async def put_queue_index(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
+    if db[chat_id][0] is put:
+        set_position(put)
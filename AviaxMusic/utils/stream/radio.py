@@ -0,0 +1,178 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import select
+import time
+
+import psutil
+
+import config
+from AviaxMusic.logging import LOGGER
+
+F_SETPIPE_SZ = 1031
+# Pipe writes up to PIPE_BUF bytes either go through whole or not at all.
+PIECE = select.PIPE_BUF
+
+
+class RadioSession:
+    __slots__ = ("source", "listeners", "proc", "task", "cpu", "dropped", "started")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.listeners = {}
+        self.proc = None
+        self.task = None
+        self.cpu = 0.0
+        self.dropped = 0
+        self.started = time.monotonic()
+
+
+# Live audio streams that several chats play at once are decoded by a single
+# ffmpeg. Its raw pcm output is copied into one fifo per chat, which pytgcalls
+# reads as a plain raw input, so every extra chat costs a pipe write instead
+# of a decode. Chats join at the current point of the stream and leave by
+# playing anything else; the decoder stops when the last one leaves.
+class Radio:
+    def __init__(self):
+        self.enabled = config.RADIO_MODE
+        self.folder = "radio"
+        self.chunk = config.RADIO_CHUNK_SIZE
+        self.rate = 48000
+        self.channels = 2
+        self.frame = self.channels * 2
+        self.sessions = {}
+        self.chats = {}
+        self.saved = 0.0
+
+    def fifo(self, source: str, chat_id: int) -> str:
+        key = hashlib.md5(source.encode()).hexdigest()[:12]
+        return os.path.join(self.folder, f"{key}_{chat_id}.pcm")
+
+    def subscribe(self, chat_id: int, source: str) -> str:
+        self.leave(chat_id)
+        session = self.sessions.get(source)
+        if session is None:
+            session = self.sessions[source] = RadioSession(source)
+            session.task = asyncio.create_task(self._pump(session))
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.fifo(source, chat_id)
+        if os.path.exists(path):
+            os.remove(path)
+        os.mkfifo(path)
+        # Opened read-write so neither side blocks and the reader only sees
+        # EOF once the session closes it.
+        fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            fcntl.fcntl(fd, F_SETPIPE_SZ, self.rate * self.channels * 2)
+        except OSError:
+            pass
+        session.listeners[chat_id] = (fd, path)
+        self.chats[chat_id] = source
+        return path
+
+    def _close(self, fd: int, path: str):
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def leave(self, chat_id: int):
+        source = self.chats.pop(chat_id, None)
+        session = self.sessions.get(source)
+        if session is None:
+            return
+        listener = session.listeners.pop(chat_id, None)
+        if listener:
+            self._close(*listener)
+        if not session.listeners:
+            self.sessions.pop(source, None)
+            session.task.cancel()
+
+    def _account(self, session: RadioSession, proc: psutil.Process):
+        try:
+            times = proc.cpu_times()
+        except psutil.Error:
+            return
+        cpu = times.user + times.system
+        self.saved += (cpu - session.cpu) * max(0, len(session.listeners) - 1)
+        session.cpu = cpu
+
+    def _write(self, session: RadioSession, fd: int, chunk: bytes):
+        for start in range(0, len(chunk), PIECE):
+            try:
+                os.write(fd, chunk[start : start + PIECE])
+            except BlockingIOError:
+                session.dropped += 1
+
+    async def _pump(self, session: RadioSession):
+        try:
+            session.proc = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-nostdin",
+                "-re",
+                "-i",
+                session.source,
+                "-vn",
+                "-f",
+                "s16le",
+                "-ac",
+                str(self.channels),
+                "-ar",
+                str(self.rate),
+                "pipe:1",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            proc = psutil.Process(session.proc.pid)
+            accounted = time.monotonic()
+            rest = b""
+            while session.listeners:
+                chunk = await session.proc.stdout.read(self.chunk)
+                if not chunk:
+                    break
+                # Only whole frames are written, so a piece a full fifo drops
+                # never shifts the s16le samples of what follows it.
+                chunk = rest + chunk
+                end = len(chunk) - len(chunk) % self.frame
+                chunk, rest = chunk[:end], chunk[end:]
+                for chat_id, (fd, _) in list(session.listeners.items()):
+                    try:
+                        self._write(session, fd, chunk)
+                    except OSError:
+                        self.leave(chat_id)
+                if time.monotonic() - accounted > 5:
+                    self._account(session, proc)
+                    accounted = time.monotonic()
+            self._account(session, proc)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            LOGGER(__name__).warning(f"Radio decoder for {session.source} failed: {e}")
+        finally:
+            if session.proc and session.proc.returncode is None:
+                session.proc.kill()
+            if self.sessions.get(session.source) is session:
+                self.sessions.pop(session.source)
+            for chat_id, listener in list(session.listeners.items()):
+                if self.chats.get(chat_id) == session.source:
+                    self.chats.pop(chat_id)
+                self._close(*listener)
+            session.listeners.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self.sessions),
+            "listeners": len(self.chats),
+            "shared": sum(max(0, len(s.listeners) - 1) for s in self.sessions.values()),
+            "dropped": sum(s.dropped for s in self.sessions.values()),
+            "saved": round(self.saved, 1),
+        }
+
+
+radio = Radio()
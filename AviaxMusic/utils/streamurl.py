@@ -0,0 +1,102 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+import config
+from AviaxMusic.utils.singleflight import SingleFlight
+
+EXPIRE = re.compile(r"/expire/(\d+)")
+# A url this close to its expiry is not handed out, ffmpeg could lose it mid-stream.
+MIN_REMAINING = 60
+
+
+def url_expiry(url: str, ttl: int) -> float:
+    parsed = urlparse(url)
+    expire = parse_qs(parsed.query).get("expire")
+    if expire and expire[0].isdigit():
+        return float(expire[0])
+    match = EXPIRE.search(parsed.path)
+    if match:
+        return float(match.group(1))
+    return time.time() + ttl
+
+
+# Caches resolved stream urls by (video id, format) until the expire time that
+# googlevideo signs into them. An entry inside the refresh margin is still
+# served, while a fresh url is resolved in the background to replace it.
+class StreamURLCache:
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.flights = SingleFlight()
+        self.limit = config.STREAM_URL_CACHE_SIZE
+        self.margin = config.STREAM_URL_REFRESH
+        self.ttl = config.STREAM_URL_TTL
+        self.refreshing = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.expired = 0
+
+    def _get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] - time.time() < MIN_REMAINING:
+            self.entries.pop(key, None)
+            self.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def _resolve(self, key, resolver, *args):
+        url = await resolver(*args)
+        self.entries[key] = (url, url_expiry(url, self.ttl))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+        return url
+
+    async def _refresh(self, key, resolver, *args):
+        try:
+            await self.flights.do(key, self._resolve, key, resolver, *args)
+            self.refreshes += 1
+        except Exception:
+            pass
+        finally:
+            self.refreshing.pop(key, None)
+
+    async def get(self, key, resolver, *args) -> str:
+        entry = self._get(key)
+        if entry is None:
+            self.misses += 1
+            return await self.flights.do(key, self._resolve, key, resolver, *args)
+        self.hits += 1
+        url, expires = entry
+        if expires - time.time() < self.margin and key not in self.refreshing:
+            self.refreshing[key] = asyncio.create_task(
+                self._refresh(key, resolver, *args)
+            )
+        return url
+
+    def invalidate(self, key):
+        # A bare video id drops the urls of every format cached for it.
+        for cached in list(self.entries):
+            if cached == key or (isinstance(cached, tuple) and cached[0] == key):
+                self.entries.pop(cached, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "limit": self.limit,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "expired": self.expired,
+            "ratio": round(self.hits * 100 / lookups, 1) if lookups else 0,
+        }
+
+
+stream_urls = StreamURLCache()
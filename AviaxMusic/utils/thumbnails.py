@@ -1,7 +1,7 @@
 import os
 import aiofiles
-import aiohttp
-from youtubesearchpython.__future__ import VideosSearch
+from AviaxMusic.core.http import http
+from AviaxMusic.utils.metacache import meta_cache
 from config import YOUTUBE_IMG_URL as FAILED  # Fallback image
 
 CACHE_DIR = "cache"
@@ -15,9 +15,8 @@ async def gen_thumb(videoid: str) -> str:
         return cache_path
 
     # Fetch video details
-    results = VideosSearch(f"https://www.youtube.com/watch?v={videoid}", limit=1)
     try:
-        data = (await results.next()).get("result", [])[0]
+        data = (await meta_cache.search(f"https://www.youtube.com/watch?v={videoid}"))[0]
         thumb_url = data["thumbnails"][-1]["url"]
     except:
         thumb_url = FAILED
@@ -25,11 +24,10 @@ async def gen_thumb(videoid: str) -> str:
     # Download thumbnail
     thumb_path = os.path.join(CACHE_DIR, f"{videoid}_raw.png")
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(thumb_url) as resp:
-                if resp.status == 200:
-                    async with aiofiles.open(thumb_path, "wb") as f:
-                        await f.write(await resp.read())
+        async with http.get(thumb_url) as resp:
+            if resp.status == 200:
+                async with aiofiles.open(thumb_path, "wb") as f:
+                    await f.write(await resp.read())
     except:
         return FAILED
 
@@ -0,0 +1,108 @@
+import asyncio
+import os
+
+import config
+from AviaxMusic.logging import LOGGER
+from AviaxMusic.utils.mediacache import media_cache
+
+CODECS = {"wav": "pcm_s16le", "flac": "flac"}
+
+
+# Re-encodes cached audio downloads once into the sample rate and channel count
+# pytgcalls streams with, in a format that is cheap to decode. The first play
+# uses the original while the transcode runs in the background; later plays,
+# loops, seeks and other chats playing the same file get the transcoded copy.
+class Transcoder:
+    def __init__(self):
+        self.enabled = config.TRANSCODE_AUDIO
+        self.format = config.TRANSCODE_FORMAT.lower()
+        if self.format not in CODECS:
+            self.format = "wav"
+        self.rate = config.TRANSCODE_SAMPLE_RATE
+        self.channels = config.TRANSCODE_CHANNELS
+        self.limit = config.TRANSCODE_WORKERS
+        self.suffix = f".play.{self.format}"
+        self.tasks = {}
+        self._slots = None
+        self.completed = 0
+        self.failed = 0
+        self.served = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        return self._slots
+
+    def target(self, path: str) -> str:
+        base = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(media_cache.folder, f"{base}{self.suffix}")
+
+    def playable(self, path):
+        if not self.enabled or path not in media_cache or path.endswith(self.suffix):
+            return path
+        out = self.target(path)
+        if out in media_cache and media_cache.get(out):
+            self.served += 1
+            return out
+        key = os.path.abspath(out)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self._run(key, path, out))
+        return path
+
+    async def _run(self, key, path, out):
+        part = f"{out}.part"
+        try:
+            async with self.slots:
+                proc = await asyncio.create_subprocess_exec(
+                    "ffmpeg",
+                    "-y",
+                    "-nostdin",
+                    "-i",
+                    path,
+                    "-vn",
+                    "-ac",
+                    str(self.channels),
+                    "-ar",
+                    str(self.rate),
+                    "-c:a",
+                    CODECS[self.format],
+                    "-f",
+                    self.format,
+                    part,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    _, stderr = await proc.communicate()
+                except asyncio.CancelledError:
+                    proc.kill()
+                    raise
+            if proc.returncode != 0:
+                raise Exception(stderr.decode(errors="ignore")[-300:])
+            os.replace(part, out)
+            media_cache.add("transcode", None, out)
+            self.completed += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.failed += 1
+            LOGGER(__name__).warning(f"Transcoding {path} failed: {e}")
+        finally:
+            self.tasks.pop(key, None)
+            if os.path.exists(part):
+                os.remove(part)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "format": self.format,
+            "running": len(self.tasks),
+            "limit": self.limit,
+            "completed": self.completed,
+            "failed": self.failed,
+            "served": self.served,
+        }
+
+
+transcoder = Transcoder()
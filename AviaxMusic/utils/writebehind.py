@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+from pymongo import DeleteOne, UpdateOne
+
+import config
+from AviaxMusic.logging import LOGGER
+
+
+# Settings writes are applied to the in-memory dicts by the setters right away
+# and only queued here. Writes to the same document are merged, a later $set
+# overrides the same fields and a delete replaces anything pending, and the
+# queue is sent as one bulk_write per collection every WRITE_BEHIND_INTERVAL
+# seconds or as soon as WRITE_BEHIND_BATCH documents are waiting. Whatever is
+# still queued is flushed when the bot stops.
+class WriteBehind:
+    def __init__(self):
+        self.interval = config.WRITE_BEHIND_INTERVAL
+        self.batch = config.WRITE_BEHIND_BATCH
+        self.pending = {}
+        self.task = None
+        self._wake = None
+        self._lock = None
+        self.queued = 0
+        self.coalesced = 0
+        self.written = 0
+        self.batches = 0
+        self.largest = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def wake(self) -> asyncio.Event:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _key(self, collection, query: dict):
+        return collection.name, tuple(sorted(query.items()))
+
+    async def _queue(self, collection, query: dict, fields):
+        key = self._key(collection, query)
+        self.queued += 1
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = [collection, query, {}, time.monotonic()]
+        else:
+            self.coalesced += 1
+        if fields is None or entry[2] is None:
+            entry[2] = fields
+        else:
+            entry[2].update(fields)
+        if self.interval <= 0:
+            await self.flush()
+        elif len(self.pending) >= self.batch:
+            self.wake.set()
+        # Also keeps retrying writes a failed flush put back.
+        if self.pending and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._run())
+
+    async def set(self, collection, query: dict, fields: dict):
+        await self._queue(collection, query, dict(fields))
+
+    async def delete(self, collection, query: dict):
+        await self._queue(collection, query, None)
+
+    async def flush(self):
+        async with self.lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+            now = time.monotonic()
+            self.last_lag = now - min(entry[3] for entry in pending.values())
+            self.max_lag = max(self.max_lag, self.last_lag)
+            grouped = {}
+            for key, (collection, query, fields, _) in pending.items():
+                if fields is None:
+                    op = DeleteOne(query)
+                else:
+                    op = UpdateOne(query, {"$set": fields}, upsert=True)
+                grouped.setdefault(collection.name, (collection, []))[1].append(
+                    (key, op)
+                )
+            for collection, ops in grouped.values():
+                try:
+                    await collection.bulk_write([op for _, op in ops], ordered=False)
+                    self.written += len(ops)
+                    self.batches += 1
+                    self.largest = max(self.largest, len(ops))
+                except Exception as e:
+                    self.failed += len(ops)
+                    LOGGER(__name__).warning(
+                        f"Write behind flush to {collection.name} failed: {e}"
+                    )
+                    for key, _ in ops:
+                        self._requeue(key, pending[key])
+
+    def _requeue(self, key, failed: list):
+        # Put a failed write back under whatever was queued for the same
+        # document during the flush: its fields are kept, newer values and a
+        # newer delete win over them.
+        entry = self.pending.get(key)
+        if entry is None:
+            self.pending[key] = failed
+            return
+        entry[3] = min(entry[3], failed[3])
+        if entry[2] is not None and failed[2] is not None:
+            entry[2] = {**failed[2], **entry[2]}
+
+    async def _run(self):
+        # With write behind turned off this only retries failed writes.
+        delay = self.interval if self.interval > 0 else 5
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self.flush()
+
+    async def stop(self):
+        # Flush first so a batch that is already being written is not cut off.
+        await self.flush()
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self.pending),
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "batches": self.batches,
+            "average": round(self.written / self.batches, 1) if self.batches else 0,
+            "largest": self.largest,
+            "failed": self.failed,
+            "lag": round(self.last_lag, 2),
+            "max_lag": round(self.max_lag, 2),
+        }
+
+
+writer = WriteBehind()
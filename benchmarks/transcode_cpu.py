@@ -0,0 +1,121 @@
+"""Compare the ffmpeg CPU cost of streaming a file before and after transcoding.
+
+Runs the same decode pytgcalls does for an AudioPiped stream (raw s16le at
+48kHz stereo to a pipe) once on the original file and once on a copy made the
+way TRANSCODE_AUDIO makes it, and reports the CPU seconds each one needs per
+second of audio. That ratio times 100 is the CPU percent a single real-time
+stream of the file costs.
+
+    python benchmarks/transcode_cpu.py downloads/<video id>.webm [--format flac]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+CODECS = {"wav": "pcm_s16le", "flac": "flac"}
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(cmd: list) -> float:
+    before = children_cpu()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return children_cpu() - before
+
+
+def duration(path: str) -> float:
+    out = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_entries",
+            "format=duration",
+            "-of",
+            "default=noprint_wrappers=1:nokey=1",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip())
+
+
+def stream_cpu(path: str, rate: int, channels: int, rounds: int) -> float:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-i",
+        path,
+        "-vn",
+        "-f",
+        "s16le",
+        "-ac",
+        str(channels),
+        "-ar",
+        str(rate),
+        "pipe:1",
+    ]
+    return min(run(cmd) for _ in range(rounds))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=CODECS, default="wav")
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    length = duration(args.file)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, f"transcoded.{args.format}")
+        start = time.monotonic()
+        cost = run(
+            [
+                "ffmpeg",
+                "-y",
+                "-nostdin",
+                "-i",
+                args.file,
+                "-vn",
+                "-ac",
+                str(args.channels),
+                "-ar",
+                str(args.rate),
+                "-c:a",
+                CODECS[args.format],
+                "-f",
+                args.format,
+                out,
+            ]
+        )
+        took = time.monotonic() - start
+        before = stream_cpu(args.file, args.rate, args.channels, args.rounds)
+        after = stream_cpu(out, args.rate, args.channels, args.rounds)
+        size = os.path.getsize(out)
+
+    print(f"audio length      : {length:.1f}s")
+    print(f"one-time transcode: {cost:.2f}s cpu, {took:.2f}s wall, {size / 1048576:.1f} MB")
+    for name, cpu in (("original", before), (args.format, after)):
+        print(
+            f"{name:<18}: {cpu:.3f}s cpu per play, "
+            f"{cpu * 100 / length:.3f}% of a core per stream"
+        )
+    if after:
+        print(f"speedup           : {before / after:.1f}x")
+    if before > after:
+        print(f"break-even after  : {cost / (before - after):.1f} plays")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import re
-from os import getenv
+from os import environ, getenv
 
 from dotenv import load_dotenv
 from pyrogram import filters
@@ -63,6 +63,8 @@ SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", None)
 
 # Maximum limit for fetching playlist's track from youtube, spotify, apple links.
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", 25))
+# How many playlist tracks are looked up on youtube at the same time
+PLAYLIST_WORKERS = int(getenv("PLAYLIST_WORKERS", 5))
 
 
 # Telegram audio and video file size limit (in bytes)
@@ -70,13 +72,120 @@ TG_AUDIO_FILESIZE_LIMIT = int(getenv("TG_AUDIO_FILESIZE_LIMIT", 104857600))
 TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 2145386496))
 # Checkout https://www.gbmb.org/mb-to-bytes for converting mb to bytes
 
+# Disk space (in bytes) the downloads folder may use before old tracks are evicted
+MEDIA_CACHE_LIMIT = int(getenv("MEDIA_CACHE_LIMIT", 5368709120))
+# Which cached track gets evicted first: "lru" (least recently used) or "lfu" (least frequently used)
+MEDIA_CACHE_POLICY = getenv("MEDIA_CACHE_POLICY", "lru").lower()
+
+# Shared HTTP connection pool used by the platform and helper modules
+HTTP_POOL_LIMIT = int(getenv("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_PER_HOST = int(getenv("HTTP_POOL_PER_HOST", 20))
+HTTP_DNS_CACHE_TTL = int(getenv("HTTP_DNS_CACHE_TTL", 300))
+HTTP_KEEPALIVE = int(getenv("HTTP_KEEPALIVE", 30))
+# Timeouts (in seconds) for opening a connection and for each read from it
+HTTP_CONNECT_TIMEOUT = int(getenv("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_READ_TIMEOUT = int(getenv("HTTP_READ_TIMEOUT", 60))
+
+# Number of yt-dlp jobs allowed to run at once and how many more may wait for a free worker
+YTDL_WORKERS = int(getenv("YTDL_WORKERS", 4))
+YTDL_QUEUE_SIZE = int(getenv("YTDL_QUEUE_SIZE", 32))
+# Seconds after which a single yt-dlp extraction or download is abandoned
+YTDL_TIMEOUT = int(getenv("YTDL_TIMEOUT", 300))
+
+# How many youtube search results are kept in memory and for how long (in seconds)
+META_CACHE_SIZE = int(getenv("META_CACHE_SIZE", 2048))
+META_CACHE_TTL = int(getenv("META_CACHE_TTL", 21600))
+# Searches that returned nothing are remembered for this long (in seconds)
+META_CACHE_NEGATIVE_TTL = int(getenv("META_CACHE_NEGATIVE_TTL", 300))
+# Set this to True to also keep search results in mongo so they survive restarts
+META_CACHE_PERSIST = bool(getenv("META_CACHE_PERSIST", False))
+
+# How many upcoming queued tracks to download while the current one plays (0 to disable)
+PREFETCH_AHEAD = int(getenv("PREFETCH_AHEAD", 1))
+# Maximum number of background prefetch downloads across all chats
+PREFETCH_LIMIT = int(getenv("PREFETCH_LIMIT", 3))
+# Seconds a now playing message waits so quick skips only post the last track
+NOTIFY_DELAY = float(getenv("NOTIFY_DELAY", 1))
+# Seconds settings writes are held back and merged before going to mongo, 0 writes at once
+WRITE_BEHIND_INTERVAL = float(getenv("WRITE_BEHIND_INTERVAL", 2))
+# Number of queued documents that triggers a flush before the interval is up
+WRITE_BEHIND_BATCH = int(getenv("WRITE_BEHIND_BATCH", 200))
+
+# How many resolved youtube stream urls are kept for seek, loop and skip
+STREAM_URL_CACHE_SIZE = int(getenv("STREAM_URL_CACHE_SIZE", 512))
+# Stream urls are refreshed in the background when they expire within this many seconds
+STREAM_URL_REFRESH = int(getenv("STREAM_URL_REFRESH", 900))
+# Lifetime (in seconds) assumed for stream urls that carry no expire time
+STREAM_URL_TTL = int(getenv("STREAM_URL_TTL", 3600))
+
+# Set this to True to start playing api downloads before they have finished
+PROGRESSIVE_PLAYBACK = bool(getenv("PROGRESSIVE_PLAYBACK", False))
+# Bytes that must be downloaded before playback starts in progressive mode
+PROGRESSIVE_BUFFER = int(getenv("PROGRESSIVE_BUFFER", 1048576))
+# Seconds ffmpeg waits for more data before giving up on a stalled download
+PROGRESSIVE_TIMEOUT = int(getenv("PROGRESSIVE_TIMEOUT", 20))
+# Bytes buffered in memory before each disk write and how often an interrupted download is resumed
+DOWNLOAD_CHUNK_SIZE = int(getenv("DOWNLOAD_CHUNK_SIZE", 1048576))
+DOWNLOAD_RETRIES = int(getenv("DOWNLOAD_RETRIES", 3))
+
+# Set this to True to re-encode downloaded audio once into a cheap to decode file for every later play
+TRANSCODE_AUDIO = bool(getenv("TRANSCODE_AUDIO", False))
+# Format of the transcoded files, wav (largest, cheapest to play) or flac
+TRANSCODE_FORMAT = getenv("TRANSCODE_FORMAT", "wav")
+# Sample rate and channel count pytgcalls streams with, so its ffmpeg does not have to resample
+TRANSCODE_SAMPLE_RATE = int(getenv("TRANSCODE_SAMPLE_RATE", 48000))
+TRANSCODE_CHANNELS = int(getenv("TRANSCODE_CHANNELS", 2))
+# Maximum number of transcodes running at once
+TRANSCODE_WORKERS = int(getenv("TRANSCODE_WORKERS", 1))
+
+# Set this to True to decode live audio streams once and share them between all chats playing them
+RADIO_MODE = bool(getenv("RADIO_MODE", False))
+# Bytes of decoded audio copied to the listening chats at a time
+RADIO_CHUNK_SIZE = int(getenv("RADIO_CHUNK_SIZE", 19200))
+
+# Maximum number of song/video api jobs waited on at once
+API_MAX_JOBS = int(getenv("API_MAX_JOBS", 20))
+# Seconds between status polls of an api job, growing from min to max while it is still downloading
+API_POLL_MIN = float(getenv("API_POLL_MIN", 2))
+API_POLL_MAX = float(getenv("API_POLL_MAX", 10))
+# Seconds after which an api job that is still downloading is given up
+API_JOB_TIMEOUT = int(getenv("API_JOB_TIMEOUT", 90))
+
+# How many audio calls one video call counts as when spreading chats over assistants
+VIDEO_CALL_WEIGHT = int(getenv("VIDEO_CALL_WEIGHT", 3))
+# Seconds between checks for disconnected assistants whose calls are moved to another one (0 to disable)
+MIGRATE_CHECK_INTERVAL = int(getenv("MIGRATE_CHECK_INTERVAL", 30))
+
+# Best stream quality allowed: high (720p video), medium (480p video) or low (360p video, lower audio)
+QUALITY_MAX = getenv("QUALITY_MAX", "medium").lower()
+# Host cpu percent at which streams drop to medium and to low quality
+QUALITY_CPU_MEDIUM = int(getenv("QUALITY_CPU_MEDIUM", 70))
+QUALITY_CPU_LOW = int(getenv("QUALITY_CPU_LOW", 90))
+# Number of active video chats at which streams drop to medium and to low quality
+QUALITY_VIDEO_MEDIUM = int(getenv("QUALITY_VIDEO_MEDIUM", 10))
+QUALITY_VIDEO_LOW = int(getenv("QUALITY_VIDEO_LOW", 25))
+# Seconds between host load checks and how many running streams are stepped down per check
+QUALITY_CHECK_INTERVAL = int(getenv("QUALITY_CHECK_INTERVAL", 30))
+QUALITY_STEP_CHATS = int(getenv("QUALITY_STEP_CHATS", 2))
+
+# Set this to True to re-encode tracks at the new speed instead of changing it live with ffmpeg filters
+SPEED_PRERENDER = bool(getenv("SPEED_PRERENDER", False))
+# Disk space (in bytes) the re-encoded speed variants may use before old ones are evicted
+SPEED_CACHE_LIMIT = int(getenv("SPEED_CACHE_LIMIT", 1073741824))
+
 
 # Get your pyrogram v2 session from Replit
-STRING1 = getenv("STRING_SESSION", None)
-STRING2 = getenv("STRING_SESSION2", None)
-STRING3 = getenv("STRING_SESSION3", None)
-STRING4 = getenv("STRING_SESSION4", None)
-STRING5 = getenv("STRING_SESSION5", None)
+# Add more assistants with STRING_SESSION2, STRING_SESSION3, ... (no upper limit)
+STRING_SESSIONS = {}
+for key, value in sorted(environ.items()):
+    if not re.fullmatch(r"STRING_SESSION\d*", key) or not value:
+        continue
+    number = int(key[len("STRING_SESSION") :] or 1)
+    if number in STRING_SESSIONS:
+        raise SystemExit(
+            f"[ERROR] - {key} is assistant {number} as well, set only one of STRING_SESSION and STRING_SESSION1."
+        )
+    STRING_SESSIONS[number] = value
 
 
 BANNED_USERS = filters.user()
@@ -0,0 +1,91 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("pyrogram")
+pytest.importorskip("dotenv")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def writebehind():
+    for name in ("API_ID", "LOG_GROUP_ID", "OWNER_ID", "DEV_ID"):
+        os.environ.setdefault(name, "1")
+    sys.path.insert(0, ROOT)
+    # Load the module on its own, importing the AviaxMusic package starts the bot.
+    if "AviaxMusic" not in sys.modules:
+        package = types.ModuleType("AviaxMusic")
+        package.__path__ = [os.path.join(ROOT, "AviaxMusic")]
+        sys.modules["AviaxMusic"] = package
+    load("AviaxMusic.logging", "AviaxMusic/logging.py")
+    return load("writebehind", "AviaxMusic/utils/writebehind.py")
+
+
+class Collection:
+    name = "chat_settings"
+
+    def __init__(self, on_write=None):
+        self.on_write = on_write
+        self.fail = True
+        self.writes = []
+
+    async def bulk_write(self, ops, ordered=True):
+        if self.on_write is not None:
+            await self.on_write()
+            self.on_write = None
+        if self.fail:
+            self.fail = False
+            raise RuntimeError("connection reset")
+        self.writes.extend(ops)
+
+
+def fields(op):
+    return op._doc["$set"]
+
+
+def test_failed_fields_survive_a_newer_write(writebehind):
+    async def run():
+        writer = writebehind.WriteBehind()
+        writer.interval = 60
+        collection = Collection(
+            lambda: writer.set(collection, {"chat_id": 1}, {"playmode": "Direct"})
+        )
+        await writer.set(collection, {"chat_id": 1}, {"lang": "hi", "playmode": "Inline"})
+        await writer.flush()
+        await writer.flush()
+        writer.task.cancel()
+        return collection.writes
+
+    writes = asyncio.run(run())
+    assert len(writes) == 1
+    assert fields(writes[0]) == {"lang": "hi", "playmode": "Direct"}
+
+
+def test_newer_delete_wins_over_failed_fields(writebehind):
+    async def run():
+        writer = writebehind.WriteBehind()
+        writer.interval = 60
+        collection = Collection(lambda: writer.delete(collection, {"chat_id": 1}))
+        await writer.set(collection, {"chat_id": 1}, {"lang": "hi"})
+        await writer.flush()
+        await writer.flush()
+        writer.task.cancel()
+        return collection.writes
+
+    writes = asyncio.run(run())
+    assert len(writes) == 1
+    assert type(writes[0]).__name__ == "DeleteOne"